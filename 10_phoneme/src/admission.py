@@ -0,0 +1,180 @@
+"""Admission control in front of inference.
+
+At most `max_active` analyses run at once; up to `max_queue` more wait for a
+slot and everything beyond that is turned away immediately with a
+Retry-After estimate instead of making every request slow together. Waiting
+requests are granted round-robin by client, so one busy client (a classroom
+of tablets behind one id counts as one) cannot push everyone else to the back,
+and no client may hold more than `max_per_client` slots plus queue places.
+A request that is still queued after `max_wait_s` gives up the same way.
+"""
+import math
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from contextlib import contextmanager
+
+
+class Rejected(Exception):
+    """Admission refused; `reason` is queue_full, client_limit or timeout"""
+
+    def __init__(self, reason, retry_after):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded, per-client fair admission with queue depth and wait statistics"""
+
+    def __init__(self, max_active=8, max_queue=16, max_per_client=4, max_wait_s=5.0, history=1000):
+        self.max_active = max(1, int(max_active))
+        self.max_queue = max(0, int(max_queue))
+        self.max_per_client = max(1, int(max_per_client))
+        self.max_wait = max_wait_s
+
+        self._cond = threading.Condition()
+        self._active = 0
+        self._queued = 0
+        # client -> deque of waiting tickets, in round-robin order
+        self._waiting = OrderedDict()
+        self._held = Counter()
+        self._admitted = 0
+        self._rejected = Counter()
+        self._events = Counter()
+        self._service_avg = 0.0
+        self._waits = deque(maxlen=history)
+
+    @contextmanager
+    def admit(self, client):
+        """Hold an inference slot for the body of the with block; yields the queue wait in s"""
+        waited = self.acquire(client)
+        started = time.perf_counter()
+        try:
+            yield waited
+        finally:
+            self.release(client, time.perf_counter() - started)
+
+    def acquire(self, client):
+        """Block until `client` may run; returns the wait in seconds or raises Rejected"""
+        with self._cond:
+            # The per-client cap covers running analyses too, not only queued ones
+            if self._held[client] >= self.max_per_client:
+                self._reject("client_limit")
+            if self._active < self.max_active and not self._queued:
+                self._active += 1
+                self._held[client] += 1
+                self._admitted += 1
+                self._waits.append(0.0)
+                return 0.0
+            if self._queued >= self.max_queue:
+                self._reject("queue_full")
+
+            ticket = {"granted": False}
+            self._waiting.setdefault(client, deque()).append(ticket)
+            self._queued += 1
+            self._held[client] += 1
+            started = time.perf_counter()
+            deadline = started + self.max_wait
+            while not ticket["granted"]:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    self._withdraw(client, ticket)
+                    self._reject("timeout")
+                self._cond.wait(remaining)
+
+            waited = time.perf_counter() - started
+            self._admitted += 1
+            self._waits.append(waited)
+            return waited
+
+    def release(self, client, service_s=0.0):
+        with self._cond:
+            self._active -= 1
+            self._drop_hold(client)
+            self._service_avg = service_s if not self._service_avg else 0.8 * self._service_avg + 0.2 * service_s
+            self._grant()
+
+    def _grant(self):
+        """Hand free slots to waiting clients in turn"""
+        granted = False
+        while self._active < self.max_active and self._waiting:
+            client, tickets = next(iter(self._waiting.items()))
+            tickets.popleft()["granted"] = True
+            if tickets:
+                self._waiting.move_to_end(client)
+            else:
+                del self._waiting[client]
+            self._queued -= 1
+            self._active += 1
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def _withdraw(self, client, ticket):
+        tickets = self._waiting[client]
+        tickets.remove(ticket)
+        if not tickets:
+            del self._waiting[client]
+        self._queued -= 1
+        self._drop_hold(client)
+
+    def _drop_hold(self, client):
+        self._held[client] -= 1
+        if self._held[client] <= 0:
+            del self._held[client]
+
+    def _reject(self, reason):
+        self._rejected[reason] += 1
+        raise Rejected(reason, self.retry_after())
+
+    def retry_after(self):
+        """Seconds until the current backlog has likely drained (at least 1)"""
+        backlog = self._queued + 1
+        return max(1, math.ceil(backlog * (self._service_avg or 1.0) / self.max_active))
+
+    @property
+    def active(self):
+        return self._active
+
+    @property
+    def queued(self):
+        return self._queued
+
+    def pressure(self):
+        """How full the wait queue is, 0 (empty) to 1 (rejecting)"""
+        if not self.max_queue:
+            return 1.0 if self._active >= self.max_active else 0.0
+        return self._queued / self.max_queue
+
+    def note(self, event):
+        """Count an event (e.g. a degraded request) in stats()"""
+        with self._cond:
+            self._events[event] += 1
+
+    def stats(self):
+        with self._cond:
+            waits = sorted(self._waits)
+
+            def percentile(p):
+                if not waits:
+                    return None
+                index = min(len(waits) - 1, int(round(p / 100.0 * (len(waits) - 1))))
+                return round(waits[index] * 1000, 2)
+
+            return {
+                "max_active": self.max_active,
+                "max_queue": self.max_queue,
+                "max_per_client": self.max_per_client,
+                "active": self._active,
+                "queue_depth": self._queued,
+                "waiting_clients": len(self._waiting),
+                "admitted": self._admitted,
+                "rejected": dict(self._rejected),
+                "events": dict(self._events),
+                "avg_service_ms": round(self._service_avg * 1000, 2),
+                "wait_p50_ms": percentile(50),
+                "wait_p95_ms": percentile(95),
+                "wait_p99_ms": percentile(99),
+                "retry_after_s": self.retry_after(),
+            }
@@ -0,0 +1,189 @@
+"""Phoneme-level alignment and scoring.
+
+The wav2vec2 eSpeak models transcribe to space-separated IPA while reference
+phonemes are eSpeak mnemonics ("tS", "aI", "3:"), so both are first split into
+IPA phoneme tokens by the shared PhonemeTokenizer (phonemes.py). The
+token sequences are then aligned with a weighted edit distance whose
+substitution costs come from phonetic features: /ɪ/ for /iː/ costs far less
+than /ɪ/ for /k/. The dynamic programme runs one row at a time in NumPy over
+a whole batch of (detected, expected) pairs, so many attempts can be scored
+in a single call.
+"""
+import threading
+
+import numpy as np
+
+# Vowel qualities: (height 0 open .. 3 close, backness 0 front .. 2 back, rounded)
+VOWELS = {
+    "i": (3.0, 0.0, 0), "y": (3.0, 0.0, 1), "ɪ": (2.5, 0.3, 0), "ᵻ": (2.5, 1.0, 0),
+    "e": (2.0, 0.0, 0), "ɛ": (1.0, 0.0, 0), "æ": (0.5, 0.0, 0), "a": (0.0, 0.0, 0),
+    "ə": (1.5, 1.0, 0), "ɚ": (1.5, 1.0, 0), "ɜ": (1.0, 1.0, 0), "ɝ": (1.0, 1.0, 0),
+    "ɐ": (0.5, 1.0, 0), "ʌ": (1.0, 2.0, 0), "ɑ": (0.0, 2.0, 0), "ɒ": (0.0, 2.0, 1),
+    "ɔ": (1.0, 2.0, 1), "o": (2.0, 2.0, 1), "ʊ": (2.5, 1.7, 1), "u": (3.0, 2.0, 1),
+}
+
+# Consonants: (place 0 bilabial .. 7 glottal, manner, voiced)
+CONSONANTS = {
+    "p": (0, "stop", 0), "b": (0, "stop", 1), "t": (3, "stop", 0), "d": (3, "stop", 1),
+    "k": (6, "stop", 0), "ɡ": (6, "stop", 1), "g": (6, "stop", 1), "ʔ": (7, "stop", 0),
+    "m": (0, "nasal", 1), "n": (3, "nasal", 1), "ŋ": (6, "nasal", 1),
+    "f": (1, "fricative", 0), "v": (1, "fricative", 1), "θ": (2, "fricative", 0), "ð": (2, "fricative", 1),
+    "s": (3, "fricative", 0), "z": (3, "fricative", 1), "ʃ": (4, "fricative", 0), "ʒ": (4, "fricative", 1),
+    "ç": (5, "fricative", 0), "x": (6, "fricative", 0), "h": (7, "fricative", 0),
+    "tʃ": (4, "affricate", 0), "dʒ": (4, "affricate", 1),
+    "ɹ": (3, "approximant", 1), "r": (3, "trill", 1), "ɾ": (3, "tap", 1),
+    "l": (3, "lateral", 1), "ɫ": (3, "lateral", 1), "j": (5, "approximant", 1), "w": (0, "approximant", 1),
+}
+
+# Dropping or adding a reduced vowel is a smaller error than any other phoneme
+INDEL_COSTS = {"ə": 0.5, "ɐ": 0.5, "ᵻ": 0.5}
+
+
+def features(token):
+    """("V", onset, offset, long) for vowels, ("C", place, manner, voiced), or None"""
+    if token in CONSONANTS:
+        return ("C",) + CONSONANTS[token]
+    long = token.endswith("ː")
+    qualities = [VOWELS[ch] for ch in token.rstrip("ː") if ch in VOWELS]
+    if not qualities:
+        return None
+    return ("V", qualities[0], qualities[-1], long)
+
+
+def _vowel_distance(a, b):
+    return (abs(a[0] - b[0]) / 3 + abs(a[1] - b[1]) / 2 + abs(a[2] - b[2])) / 3
+
+
+def substitution_cost(a, b):
+    """Cost of hearing phoneme b where a was expected, in [0, 1]"""
+    if a == b:
+        return 0.0
+    fa, fb = features(a), features(b)
+    if fa is None or fb is None or fa[0] != fb[0]:
+        return 1.0
+    if fa[0] == "V":
+        distance = (_vowel_distance(fa[1], fb[1]) + _vowel_distance(fa[2], fb[2])) / 2
+        return min(1.0, 0.2 + 0.6 * distance + 0.1 * (fa[3] != fb[3]))
+    return min(1.0, 0.2 + 0.4 * abs(fa[1] - fb[1]) / 7 + 0.3 * (fa[2] != fb[2]) + 0.1 * (fa[3] != fb[3]))
+
+
+class PhonemeAligner:
+    """Tokenizes eSpeak/IPA strings and aligns them with feature-weighted costs"""
+
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+
+        # Token ids and the pairwise substitution / per-token indel cost tables
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._tokens = []
+        self._sub = np.zeros((0, 0))
+        self._indel = np.zeros(0)
+        self._encode(sorted(set(tokenizer.table.values()) | set(VOWELS) | set(CONSONANTS)))
+
+    def tokenize(self, seq):
+        """IPA phoneme tokens of an eSpeak or IPA string"""
+        return self.tokenizer.tokenize(seq)
+
+    def _encode(self, tokens):
+        """Token ids, growing the cost tables for tokens not seen before"""
+        new = [t for t in dict.fromkeys(tokens) if t not in self._ids]
+        if new:
+            with self._lock:
+                new = [t for t in new if t not in self._ids]
+                if new:
+                    tokens_all = self._tokens + new
+                    size = len(tokens_all)
+                    sub = np.empty((size, size))
+                    old = len(self._tokens)
+                    sub[:old, :old] = self._sub
+                    for i, a in enumerate(tokens_all):
+                        for j in range(old if i < old else 0, size):
+                            sub[i, j] = substitution_cost(a, tokens_all[j])
+                    ids = dict(self._ids)
+                    for t in new:
+                        ids[t] = len(ids)
+                    self._indel = np.concatenate([self._indel, [INDEL_COSTS.get(t, 1.0) for t in new]])
+                    self._tokens = tokens_all
+                    self._sub = sub
+                    # Ids go out last: lock-free readers that see a new id also see tables covering it
+                    self._ids = ids
+        ids = self._ids
+        return [ids[t] for t in tokens]
+
+    def align_many(self, pairs):
+        """Align (detected, expected) string pairs in one batched DP; returns a result per pair"""
+        if not pairs:
+            return []
+        tokens = self.tokenizer.tokenize_many([seq for pair in pairs for seq in pair])
+        pairs = list(zip(tokens[0::2], tokens[1::2]))
+        encoded = [(self._encode(d), self._encode(e)) for d, e in pairs]
+        sub_table, indel = self._sub, self._indel
+
+        batch = len(pairs)
+        n = max(len(e) for _, e in encoded)
+        m = max(len(d) for d, _ in encoded)
+        expected = np.zeros((batch, n), dtype=np.int64)
+        detected = np.zeros((batch, m), dtype=np.int64)
+        for b, (d, e) in enumerate(encoded):
+            expected[b, :len(e)] = e
+            detected[b, :len(d)] = d
+
+        sub = sub_table[expected[:, :, None], detected[:, None, :]]
+        deletion = indel[expected]
+        insertion = np.concatenate([np.zeros((batch, 1)), np.cumsum(indel[detected], axis=1)], axis=1)
+
+        # D[b, i, j]: cost of aligning expected[:i] with detected[:j]. Padding
+        # never feeds back into the cells a shorter pair reads.
+        D = np.empty((batch, n + 1, m + 1))
+        D[:, 0] = insertion
+        for i in range(1, n + 1):
+            prev = D[:, i - 1]
+            row = np.empty((batch, m + 1))
+            row[:, 0] = prev[:, 0] + deletion[:, i - 1]
+            row[:, 1:] = np.minimum(prev[:, 1:] + deletion[:, i - 1:i], prev[:, :-1] + sub[:, i - 1])
+            # Insertions run along the row: min over k <= j of row[k] + ins(k..j)
+            D[:, i] = np.minimum.accumulate(row - insertion, axis=1) + insertion
+
+        return [
+            self._result(D[b], sub[b], deletion[b], insertion[b], det_tokens, exp_tokens)
+            for b, (det_tokens, exp_tokens) in enumerate(pairs)
+        ]
+
+    def align(self, detected, expected):
+        return self.align_many([(detected, expected)])[0]
+
+    def score(self, detected, expected):
+        """0-100 similarity of a transcription to the expected phonemes"""
+        return self.align(detected, expected)["score"]
+
+    @staticmethod
+    def _result(D, sub, deletion, insertion, detected, expected):
+        i, j = len(expected), len(detected)
+        distance = float(D[i, j])
+        ops = []
+        while i or j:
+            if i and j and np.isclose(D[i, j], D[i - 1, j - 1] + sub[i - 1, j - 1]):
+                op = "match" if sub[i - 1, j - 1] == 0 else "substitute"
+                ops.append({"op": op, "expected": expected[i - 1], "detected": detected[j - 1],
+                            "cost": round(float(sub[i - 1, j - 1]), 2)})
+                i, j = i - 1, j - 1
+            elif i and np.isclose(D[i, j], D[i - 1, j] + deletion[i - 1]):
+                ops.append({"op": "delete", "expected": expected[i - 1], "detected": None,
+                            "cost": round(float(deletion[i - 1]), 2)})
+                i -= 1
+            else:
+                ops.append({"op": "insert", "expected": None, "detected": detected[j - 1],
+                            "cost": round(float(insertion[j] - insertion[j - 1]), 2)})
+                j -= 1
+        ops.reverse()
+
+        worst = max(float(deletion[:len(expected)].sum()), float(insertion[len(detected)]), 1e-9)
+        score = int(round(100 * max(0.0, 1 - distance / worst))) if expected else 0
+        return {
+            "score": score,
+            "distance": round(distance, 3),
+            "expected": expected,
+            "detected": detected,
+            "ops": ops,
+        }
@@ -0,0 +1,88 @@
+"""Cache of model outputs for repeated /analyze submissions.
+
+Learners retry, and the frontend re-submits the same recording to score it
+against another word or with the other model. Entries are keyed by a
+fingerprint of the prepared 16 kHz PCM (taken after decoding, trimming and
+capping, so the same audio in another container still hits) and the model
+id, and hold that clip's CTC logits and greedy transcription. A hit skips
+the forward pass; scoring against the requested word and accent (alignment,
+GOP) still runs on every request. Entries live in a bounded in-memory LRU,
+limited by count and by bytes.
+"""
+import hashlib
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class AnalysisCache:
+    """LRU of (logits, transcription) by (PCM fingerprint, model id)"""
+
+    def __init__(self, max_entries=256, max_bytes=128 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def fingerprint(self, speech):
+        """Hash of a prepared clip's samples, or None when the cache is disabled"""
+        if not self.enabled:
+            return None
+        samples = np.ascontiguousarray(speech, dtype=np.float32)
+        return hashlib.blake2b(samples.tobytes(), digest_size=16).hexdigest()
+
+    def get(self, fingerprint, model_id):
+        """(logits, transcription) for a clip and model, or None"""
+        if fingerprint is None:
+            return None
+        with self._lock:
+            entry = self._entries.get((fingerprint, model_id))
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end((fingerprint, model_id))
+            self._hits += 1
+            return entry[0], entry[1]
+
+    def put(self, fingerprint, model_id, logits, transcription):
+        """Store a clip's model output; `logits` must not be a view of a larger batch"""
+        if fingerprint is None:
+            return
+        size = logits.nbytes + len(transcription.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        key = (fingerprint, model_id)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[2]
+            self._entries[key] = (logits, transcription, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self._evictions += 1
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round(self._hits / lookups, 3) if lookups else 0,
+            }
@@ -0,0 +1,174 @@
+"""ASGI entry point: async catalog/TTS endpoints in front of the Flask app.
+
+    python src/asgi.py                                   # one process
+    WEB_ASGI=1 gunicorn -c src/gunicorn.conf.py          # pre-forked uvicorn workers
+
+The event loop never runs model code or file I/O. Catalog responses are
+precompiled, but looking one up stats (and after a change reloads) the
+catalog file, so lookups and the TTS cache/espeak-ng work are awaited on a
+small I/O executor; static files are streamed by Starlette. Everything else
+(/analyze, /models, /stats, ...) is the unchanged Flask app,
+mounted through a WSGI bridge whose thread pool (ASGI_INFERENCE_THREADS)
+bounds how many requests can be inside the app at once, where admission
+control decides which of them run inference. A slow forward pass therefore
+queues other inference, not navigation, audio or page loads.
+/stream sessions each hold one thread of their own executor.
+"""
+import asyncio
+import os
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Mount, Route, WebSocketRoute
+from werkzeug.http import parse_etags
+
+import server
+from metrics import TTS_REQUESTS
+
+INFERENCE_THREADS = int(os.environ.get("ASGI_INFERENCE_THREADS", os.environ.get("WEB_THREADS", "32")))
+IO_THREADS = int(os.environ.get("ASGI_IO_THREADS", "16"))
+STREAM_SESSIONS = int(os.environ.get("ASGI_STREAM_SESSIONS", "16"))
+
+IO_POOL = ThreadPoolExecutor(max_workers=IO_THREADS, thread_name_prefix="asgi-io")
+STREAM_POOL = ThreadPoolExecutor(max_workers=STREAM_SESSIONS, thread_name_prefix="asgi-stream")
+
+
+def run_in(pool, fn, *args):
+    return asyncio.get_running_loop().run_in_executor(pool, partial(fn, *args))
+
+
+def not_modified(request, etag):
+    return parse_etags(request.headers.get("if-none-match")).contains(etag)
+
+
+def catalog_endpoint(view, item=None):
+    """Async twin of server.catalog_response for one navigation view"""
+    async def endpoint(request):
+        kwargs = {item: request.path_params[item]} if item else {}
+        # The lookup stats the catalog file and may reload it, so it stays off the loop
+        compiled, error = await run_in(IO_POOL, partial(server.catalog_lookup, view, request.query_params, **kwargs))
+        if error:
+            return JSONResponse({"error": error[0]}, status_code=error[1])
+
+        body, etag = compiled
+        headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+        if not_modified(request, etag):
+            return Response(status_code=304, headers=headers)
+        return Response(body, media_type="application/json", headers=headers)
+    return endpoint
+
+
+async def tts_args(request):
+    """TTS parameters from the query string (GET) or JSON body (POST)"""
+    if request.method == "GET":
+        return request.query_params
+    try:
+        data = await request.json()
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def tts_response(request, text, voice):
+    """Serve synthesized WAV through the TTS cache, with ETag/Cache-Control"""
+    key = server.tts_key(text, voice)
+    headers = {"ETag": f'"{key}"', "Cache-Control": f"public, max-age={server.TTS_CACHE_MAX_AGE}"}
+    if not_modified(request, key):
+        TTS_REQUESTS.labels("not_modified").inc()
+        return Response(status_code=304, headers=headers)
+
+    try:
+        _, wav = await run_in(IO_POOL, server.get_tts_wav, text, voice)
+    except subprocess.CalledProcessError as e:
+        return JSONResponse({"error": f"espeak error: {e.stderr.decode()}"}, status_code=500)
+    except Exception as e:
+        return JSONResponse({"error": f"TTS failed: {e}"}, status_code=500)
+    if not wav:
+        return JSONResponse({"error": "Audio generation failed"}, status_code=500)
+    return Response(wav, media_type="audio/wav", headers=headers)
+
+
+async def text_to_speech(request):
+    """Generate speech audio using espeak"""
+    data = await tts_args(request)
+    text = data.get("text", "")
+    if not text:
+        return JSONResponse({"error": "No text provided"}, status_code=400)
+    voice = server.tts_voice(data.get("accent", "American"))
+    return await tts_response(request, text, voice)
+
+
+class Disconnected(Exception):
+    pass
+
+
+class BlockingWebSocket:
+    """The blocking receive()/send() that server.run_stream expects, over a Starlette WebSocket"""
+
+    def __init__(self, websocket, loop):
+        self.websocket = websocket
+        self.loop = loop
+
+    def _call(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def receive(self):
+        message = self._call(self.websocket.receive())
+        if message["type"] == "websocket.disconnect":
+            raise Disconnected()
+        return message["text"] if message.get("text") is not None else message.get("bytes")
+
+    def send(self, data):
+        try:
+            self._call(self.websocket.send_text(data))
+        except Exception as e:
+            # The client went away while the session was busy (e.g. in inference)
+            raise Disconnected() from e
+
+
+async def stream(websocket):
+    await websocket.accept()
+    client = websocket.headers.get(server.CLIENT_ID_HEADER) or (websocket.client.host if websocket.client else None)
+    try:
+        await run_in(STREAM_POOL, server.run_stream,
+                     BlockingWebSocket(websocket, asyncio.get_running_loop()), client or "unknown")
+        await websocket.close()
+    except Disconnected:
+        pass
+
+
+def static_routes():
+    """index.html at / and every file of the Flask static folder, served async"""
+    static_dir = server.app.static_folder
+    routes = [Route("/", partial(static_file, os.path.join(static_dir, "index.html")))]
+    for name in sorted(os.listdir(static_dir)):
+        routes.append(Route(f"/{name}", partial(static_file, os.path.join(static_dir, name))))
+    return routes
+
+
+async def static_file(path, request):
+    return FileResponse(path)
+
+
+app = Starlette(routes=[
+    Route("/user-modes", catalog_endpoint("user_modes")),
+    Route("/patterns", catalog_endpoint("patterns")),
+    Route("/pattern/{pattern_id:int}/words", catalog_endpoint("pattern_words", "pattern_id")),
+    Route("/tts", text_to_speech, methods=["GET", "POST"]),
+    WebSocketRoute("/stream", stream),
+    *static_routes(),
+    # Inference and everything else: the Flask app on a bounded thread pool
+    Mount("/", app=WSGIMiddleware(server.app, workers=INFERENCE_THREADS)),
+])
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    print(f"✓ ASGI server on :{os.environ.get('PORT', '5000')} "
+          f"({INFERENCE_THREADS} inference threads, {IO_THREADS} I/O threads)")
+    uvicorn.run(app, host="0.0.0.0", port=int(os.environ.get("PORT", "5000")))
@@ -0,0 +1,150 @@
+"""Decode uploaded clips to 16 kHz mono float32 without librosa.
+
+The container is sniffed from the first bytes instead of trying decoders in
+turn. WAV, FLAC and OGG (Vorbis/Opus) are read with soundfile straight from
+memory. WebM/Opus, which MediaRecorder produces in Chrome and Firefox, and
+anything else go through one ffmpeg pipe that already outputs 16 kHz mono
+float32. Resampling only happens when soundfile's rate differs from the
+target, using a polyphase filter (scipy.signal.resample_poly).
+
+    python src/audio_decode.py [clip ...]     # benchmark against librosa.load
+"""
+import argparse
+import io
+import os
+import subprocess
+import sys
+import time
+from math import gcd
+
+import numpy as np
+import soundfile as sf
+from scipy.signal import resample_poly
+
+SAMPLE_RATE = 16000
+
+
+def sniff(data):
+    """Container of an uploaded clip: wav, flac, ogg, webm, mp3 or unknown"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return "wav"
+    if data[:4] == b"fLaC":
+        return "flac"
+    if data[:4] == b"OggS":
+        return "ogg"
+    if data[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"
+    if data[:3] == b"ID3" or (len(data) > 1 and data[0] == 0xFF and data[1] & 0xE0 == 0xE0):
+        return "mp3"
+    return "unknown"
+
+
+def resample(speech, orig_sr, sr=SAMPLE_RATE):
+    """Polyphase resampling; a no-op when the rates already match"""
+    if orig_sr == sr:
+        return speech
+    g = gcd(int(orig_sr), int(sr))
+    return resample_poly(speech, sr // g, int(orig_sr) // g).astype(np.float32)
+
+
+def decode_soundfile(data, sr=SAMPLE_RATE):
+    speech, orig_sr = sf.read(io.BytesIO(data), dtype="float32", always_2d=True)
+    return resample(speech.mean(axis=1), orig_sr, sr)
+
+
+def decode_ffmpeg(data, sr=SAMPLE_RATE, timeout=30):
+    result = subprocess.run([
+        'ffmpeg', '-nostdin', '-loglevel', 'error',
+        '-i', 'pipe:0',
+        '-f', 'f32le', '-ac', '1', '-ar', str(sr),
+        'pipe:1'
+    ], input=data, capture_output=True, check=True, timeout=timeout)
+    return np.frombuffer(result.stdout, dtype=np.float32)
+
+
+def decode_audio(data, sr=SAMPLE_RATE):
+    """Decode uploaded audio bytes to mono float32 at `sr` without touching disk"""
+    if sniff(data) in ("wav", "flac", "ogg"):
+        try:
+            return decode_soundfile(data, sr)
+        except Exception:
+            # e.g. WAV codecs or Ogg streams this libsndfile cannot read
+            pass
+    return decode_ffmpeg(data, sr)
+
+
+def decode_librosa(data, sr=SAMPLE_RATE):
+    """The previous decode path, kept for the benchmark"""
+    import librosa
+
+    try:
+        return librosa.load(io.BytesIO(data), sr=sr)[0]
+    except Exception:
+        return decode_ffmpeg(data, sr)
+
+
+def sample_clips():
+    """A spoken sentence as WAV at 22.05/16/48 kHz, OGG/Opus and WebM/Opus"""
+    wav = subprocess.run(['espeak-ng', '-v', 'en-us', '--stdout',
+                          'The quick brown fox jumps over the lazy dog'],
+                         capture_output=True, check=True, timeout=10).stdout
+
+    def convert(args):
+        return subprocess.run(['ffmpeg', '-nostdin', '-loglevel', 'error', '-i', 'pipe:0', *args, 'pipe:1'],
+                              input=wav, capture_output=True, check=True, timeout=30).stdout
+
+    return [
+        ("wav-22k", convert(['-f', 'wav'])),
+        ("wav-16k", convert(['-ar', '16000', '-f', 'wav'])),
+        ("wav-48k", convert(['-ar', '48000', '-f', 'wav'])),
+        ("ogg-opus", convert(['-ar', '48000', '-c:a', 'libopus', '-f', 'ogg'])),
+        ("webm-opus", convert(['-ar', '48000', '-c:a', 'libopus', '-f', 'webm'])),
+    ]
+
+
+def import_seconds(module):
+    """Wall time of a cold `import module` in a fresh interpreter"""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, '-c', f'import {module}'], check=True,
+                   cwd=os.path.dirname(os.path.abspath(__file__)))
+    return time.perf_counter() - started
+
+
+def benchmark(clips, repeat=20):
+    print(f"cold import: librosa {import_seconds('librosa'):.2f}s, "
+          f"audio_decode {import_seconds('audio_decode'):.2f}s")
+    print(f"{'clip':<12} {'format':<8} {'librosa ms':>10} {'fast ms':>8} {'speedup':>8} {'max |diff|':>10}")
+    for name, data in clips:
+        # Warm both paths once (librosa's lazy imports, ffmpeg page cache)
+        reference, fast = decode_librosa(data), decode_audio(data)
+        timings = []
+        for fn in (decode_librosa, decode_audio):
+            started = time.perf_counter()
+            for _ in range(repeat):
+                fn(data)
+            timings.append((time.perf_counter() - started) / repeat * 1000)
+        n = min(len(reference), len(fast))
+        diff = float(np.abs(reference[:n] - fast[:n]).max()) if n else 0.0
+        print(f"{name:<12} {sniff(data):<8} {timings[0]:10.2f} {timings[1]:8.2f} "
+              f"{timings[0] / timings[1]:7.1f}x {diff:10.4f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark decode_audio against librosa.load")
+    parser.add_argument("clips", nargs="*", help="audio files (default: synthesized samples)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    if args.clips:
+        clips = []
+        for path in args.clips:
+            with open(path, "rb") as f:
+                clips.append((os.path.basename(path)[:12], f.read()))
+    else:
+        clips = sample_clips()
+    benchmark(clips, args.repeat)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
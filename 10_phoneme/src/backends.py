@@ -0,0 +1,125 @@
+"""Inference backends for the wav2vec2 eSpeak CTC checkpoints.
+
+Every backend is called as backend(input_values, attention_mask) and returns
+a (batch, frames, vocab) logits tensor, so the server does not care which one
+a model uses:
+
+    torch      fp32 Wav2Vec2ForCTC (reference)
+    int8       dynamically int8-quantized Linear layers (torch)
+    onnx       exported ONNX graph run with ONNX Runtime
+    onnx-int8  the exported graph with int8 weights
+
+ONNX graphs are produced and checked against fp32 by export_onnx.py.
+"""
+import os
+
+import numpy as np
+import torch
+from transformers import Wav2Vec2Config, Wav2Vec2ForCTC, Wav2Vec2Processor
+
+CHECKPOINTS = {
+    "wav2vec2_lv60": "facebook/wav2vec2-lv-60-espeak-cv-ft",
+    "wav2vec2_xlsr53": "facebook/wav2vec2-xlsr-53-espeak-cv-ft",
+}
+
+BACKENDS = ("torch", "int8", "onnx", "onnx-int8")
+
+DEFAULT_ONNX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "onnx")
+
+
+def onnx_path(onnx_dir, model_id, backend="onnx"):
+    suffix = ".int8.onnx" if backend == "onnx-int8" else ".onnx"
+    return os.path.join(onnx_dir, model_id + suffix)
+
+
+def output_lengths(config, input_lengths):
+    """Number of CTC frames the convolutional feature encoder yields per input length"""
+    lengths = input_lengths
+    for kernel, stride in zip(config.conv_kernel, config.conv_stride):
+        lengths = torch.div(lengths - kernel, stride, rounding_mode="floor") + 1
+    return lengths
+
+
+def tensor_bytes(value):
+    """Size of a state_dict value: a tensor, or a tuple of them (packed quantized params)"""
+    if isinstance(value, torch.Tensor):
+        return value.numel() * value.element_size()
+    if isinstance(value, (tuple, list)):
+        return sum(tensor_bytes(item) for item in value)
+    return 0
+
+
+class TorchBackend:
+    """Wav2Vec2ForCTC (fp32 or dynamically quantized) run in-process"""
+
+    # Weights inherited by forked workers stay usable (see gunicorn.conf.py)
+    fork_safe = True
+
+    def __init__(self, model, name="torch"):
+        self.model = model
+        self.name = name
+        self.config = model.config
+
+    def __call__(self, input_values, attention_mask):
+        with torch.no_grad():
+            return self.model(input_values, attention_mask=attention_mask).logits
+
+    def memory_bytes(self):
+        # Dynamically quantized Linear layers keep their int8 weights in packed
+        # params, which parameters() and buffers() do not list; state_dict() does
+        return sum(tensor_bytes(value) for value in self.model.state_dict().values())
+
+
+class OnnxBackend:
+    """Exported graph run with ONNX Runtime on CPU"""
+
+    # The session's thread pool does not survive fork; workers open their own
+    fork_safe = False
+
+    def __init__(self, path, config, name="onnx", threads=0):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        self.path = path
+        self.name = name
+        self.config = config
+
+    def __call__(self, input_values, attention_mask):
+        logits, = self.session.run(["logits"], {
+            "input_values": input_values.numpy().astype(np.float32),
+            "attention_mask": attention_mask.numpy().astype(np.int64),
+        })
+        return torch.from_numpy(logits)
+
+    def memory_bytes(self):
+        return os.path.getsize(self.path)
+
+
+def load_torch_model(model_id):
+    model = Wav2Vec2ForCTC.from_pretrained(CHECKPOINTS[model_id])
+    model.eval()
+    return model
+
+
+def load_backend(model_id, backend="torch", onnx_dir=DEFAULT_ONNX_DIR, threads=0):
+    """Return (processor, backend) for one of CHECKPOINTS; `threads` caps ONNX Runtime's intra-op pool"""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend!r}, expected one of {', '.join(BACKENDS)}")
+
+    processor = Wav2Vec2Processor.from_pretrained(CHECKPOINTS[model_id])
+
+    if backend in ("onnx", "onnx-int8"):
+        path = onnx_path(onnx_dir, model_id, backend)
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found (run export_onnx.py)")
+        config = Wav2Vec2Config.from_pretrained(CHECKPOINTS[model_id])
+        return processor, OnnxBackend(path, config, backend, threads)
+
+    model = load_torch_model(model_id)
+    if backend == "int8":
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return processor, TorchBackend(model, backend)
@@ -0,0 +1,214 @@
+"""Score folders of recordings offline with the server's models and scoring.
+
+    python src/batch_score.py class3/ --output class3.csv
+    python src/batch_score.py manifest.csv --model wav2vec2_xlsr53 --mode gop --output scores.jsonl
+
+The input is a directory or a manifest. For a directory, every audio file
+below it is scored. The word is taken from the file name up to the first "_"
+or "-" ("cat_alice.webm"), or with --word-from dir from the parent directory
+("cat/alice.webm"). A manifest is a .csv with a header row or a .jsonl file
+with `file`, `word` and an optional `accent` per clip; relative paths are
+resolved against the manifest's directory.
+
+A pool of --jobs processes reads and decodes clips (decode_audio plus the
+server's VAD trim and length cap) while the main process runs them through
+forward_batch in batches of --batch-size and scores them with the same code
+as /analyze. A row therefore matches what /analyze returns for that clip,
+without an HTTP round trip or the micro-batching window per clip. Rows are
+written in input order as CSV or JSONL (from the --output extension); JSONL
+rows carry the full result, including alignment ops and GOP details.
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from audio_decode import decode_audio
+from vad import prepare_speech
+
+AUDIO_EXTENSIONS = (".wav", ".webm", ".ogg", ".opus", ".mp3", ".m4a", ".flac")
+CSV_COLUMNS = ["file", "word", "accent", "model", "mode", "score", "match", "transcription", "detected_ipa",
+               "expected_espeak", "expected_ipa", "duration_s", "error"]
+
+
+def manifest_items(path, word_from, default_accent):
+    """(file, word, accent) for a directory of recordings or a .csv/.jsonl manifest"""
+    if os.path.isdir(path):
+        items = []
+        for root, _, files in os.walk(path):
+            for name in sorted(files):
+                if not name.lower().endswith(AUDIO_EXTENSIONS):
+                    continue
+                if word_from == "dir":
+                    word = os.path.basename(root)
+                else:
+                    word = re.split(r"[_\-]", os.path.splitext(name)[0])[0]
+                items.append((os.path.join(root, name), word.lower(), default_accent))
+        return sorted(items)
+
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    items = []
+    for number, row in enumerate(rows, 1):
+        if not row.get("file") or not row.get("word"):
+            raise SystemExit(f"✗ {path}: entry {number} needs `file` and `word`")
+        items.append((os.path.join(base, row["file"]), row["word"], row.get("accent") or default_accent))
+    return items
+
+
+def load_clip(path, vad):
+    """Decode and trim one recording in a pool process: (speech, audio report, error)"""
+    try:
+        with open(path, "rb") as f:
+            speech = decode_audio(f.read())
+        speech, report = prepare_speech(speech, **vad)
+        return speech, report, None
+    except Exception as e:
+        return None, None, f"Audio load failed: {e}"
+
+
+def decoded(pool, items, vad, ahead):
+    """Decoded clips in input order, keeping at most `ahead` decodes in flight"""
+    pending = deque()
+    items = iter(items)
+    for item in items:
+        pending.append((item, pool.submit(load_clip, item[0], vad)))
+        if len(pending) >= ahead:
+            break
+    while pending:
+        item, future = pending.popleft()
+        yield item, future.result()
+        for next_item in items:
+            pending.append((next_item, pool.submit(load_clip, next_item[0], vad)))
+            break
+
+
+def score_batch(server, model_id, mode, batch):
+    """Forward one batch of decoded clips and score them; returns a result per clip"""
+    logits = server.forward_batch(model_id, [speech for _, speech, _ in batch])
+    results = []
+    for ((path, word, accent), _, report), clip_logits in zip(batch, logits):
+        transcription = server.decode_logits(model_id, clip_logits)
+        expected_espeak, expected_ipa = server.expected_phonemes(word, accent)
+        result = server.analysis_result(transcription, expected_espeak, expected_ipa)
+        if mode == "gop":
+            server.add_gop(result, model_id, clip_logits, expected_espeak)
+        result["audio"] = report
+        results.append(result)
+    return results
+
+
+def error_row(item, model_id, mode, error):
+    path, word, accent = item
+    return {"file": path, "word": word, "accent": accent, "model": model_id, "mode": mode, "error": error}
+
+
+class RowWriter:
+    """CSV (flat columns) or JSONL (full results) output"""
+
+    def __init__(self, path):
+        self.f = open(path, "w", encoding="utf-8", newline="")
+        self.jsonl = path.endswith(".jsonl")
+        if not self.jsonl:
+            self.csv = csv.DictWriter(self.f, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+            self.csv.writeheader()
+
+    def write(self, row):
+        if self.jsonl:
+            self.f.write(json.dumps(row, ensure_ascii=False) + "\n")
+        else:
+            self.csv.writerow(dict(row, duration_s=(row.get("audio") or {}).get("duration_s")))
+
+    def close(self):
+        self.f.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a directory or manifest of recordings offline")
+    parser.add_argument("input", help="directory of recordings, or a .csv/.jsonl manifest (file, word, accent)")
+    parser.add_argument("--output", required=True, help="scores.csv or scores.jsonl")
+    parser.add_argument("--model", default="wav2vec2_lv60")
+    parser.add_argument("--mode", default="alignment", help="scoring mode, as for /analyze")
+    parser.add_argument("--accent", help="accent for clips without one (default: the server's default)")
+    parser.add_argument("--word-from", default="name", choices=("name", "dir"),
+                        help="for a directory: word from the file name or the parent directory")
+    parser.add_argument("--batch-size", type=int, default=16, help="clips per forward pass")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="decoding processes")
+    args = parser.parse_args(argv)
+
+    # The server module carries the models, settings and scoring code
+    import server
+
+    if args.model not in server.MODELS:
+        raise SystemExit(f"✗ Unknown model {args.model} (available: {', '.join(server.MODELS)})")
+    if args.mode not in server.SCORING_MODES:
+        raise SystemExit(f"✗ Unknown mode {args.mode} (available: {', '.join(server.SCORING_MODES)})")
+    default_accent = args.accent or ("en-US" if hasattr(server, "ACCENT_MAP") else "American")
+    items = manifest_items(args.input, args.word_from, default_accent)
+    if not items:
+        raise SystemExit(f"✗ No recordings found in {args.input}")
+
+    server.REGISTRY.get(args.model)
+    vad = {"trim": server.VAD_TRIM, "max_seconds": server.MAX_AUDIO_SECONDS,
+           "top_db": server.VAD_TOP_DB, "pad_ms": server.VAD_PAD_MS}
+    print(f"✓ Scoring {len(items)} clips with {args.model} ({args.mode}), "
+          f"{args.jobs} decoders, batches of {args.batch_size}")
+
+    writer = RowWriter(args.output)
+    started = time.time()
+    done = failed = 0
+
+    def flush(batch):
+        nonlocal failed
+        try:
+            results = score_batch(server, args.model, args.mode, batch)
+        except Exception as e:
+            failed += len(batch)
+            return [error_row(item, args.model, args.mode, f"Inference failed: {e}") for item, _, _ in batch]
+        return [{"file": path, "word": word, "accent": accent, "model": args.model, **result, "error": None}
+                for ((path, word, accent), _, _), result in zip(batch, results)]
+
+    # spawn: the decoders must not inherit the parent's torch threads
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=args.jobs, mp_context=context) as pool:
+        batch, rows = [], deque()
+        for item, (speech, report, error) in decoded(pool, items, vad, ahead=4 * args.jobs + args.batch_size):
+            # Rows wait until their batch is scored, so the output keeps the input order
+            if error:
+                failed += 1
+                rows.append(error_row(item, args.model, args.mode, error))
+            else:
+                batch.append((item, speech, report))
+                rows.append(None)
+            if len(batch) >= args.batch_size:
+                scored = iter(flush(batch))
+                batch = []
+                for row in rows:
+                    writer.write(row or next(scored))
+                done += len(rows)
+                rows.clear()
+                print(f"  {done}/{len(items)} clips, {done / (time.time() - started):.1f} clips/s", file=sys.stderr)
+        scored = iter(flush(batch) if batch else [])
+        for row in rows:
+            writer.write(row or next(scored))
+        done += len(rows)
+    writer.close()
+
+    elapsed = time.time() - started
+    print(f"✓ Wrote {done} rows to {args.output} in {elapsed:.1f}s "
+          f"({done / elapsed:.1f} clips/s, {failed} failed)")
+    return 1 if failed == len(items) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
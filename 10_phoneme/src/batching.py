@@ -0,0 +1,133 @@
+"""Request-coalescing inference queue for the wav2vec2 CTC models.
+
+Each model gets one MicroBatcher. Request threads submit a clip and block on
+a Future; a single worker thread gathers whatever arrives within a short
+window (or until the batch is full), runs one padded forward pass and fans
+the per-clip results back out to the waiting requests.
+"""
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+
+class MicroBatcher:
+    """Coalesce concurrent clips into batched forward passes"""
+
+    def __init__(self, name, forward_fn, max_batch=8, max_wait_ms=20, history=1000, thread_init=None):
+        self.name = name
+        self.forward_fn = forward_fn
+        # Called first thing in the worker thread, e.g. to set its intra-op thread count
+        self.thread_init = thread_init
+        self.max_batch = max(1, int(max_batch))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = time.time()
+        self._requests = 0
+        self._batches = 0
+        self._errors = 0
+        self._largest_batch = 0
+        self._wait_total = 0.0
+        self._forward_total = 0.0
+        # (finished_at, latency) for the most recent requests
+        self._recent = deque(maxlen=history)
+
+        self._thread = threading.Thread(target=self._run, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, speech):
+        """Queue a clip and return a Future resolving to its forward result"""
+        future = Future()
+        self._queue.put((speech, future, time.perf_counter()))
+        return future
+
+    def infer(self, speech, timeout=None):
+        """Queue a clip and block until its result is ready"""
+        return self.submit(speech).result(timeout)
+
+    def infer_timed(self, speech, timeout=None):
+        """infer() plus (seconds waiting for the batch, seconds in its forward pass)"""
+        future = self.submit(speech)
+        result = future.result(timeout)
+        return result, future.timing
+
+    def queue_depth(self):
+        return self._queue.qsize()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining <= 0:
+                    batch.append(self._queue.get_nowait())
+                else:
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        if self.thread_init:
+            self.thread_init()
+        while True:
+            batch = self._collect()
+            started = time.perf_counter()
+            try:
+                results = self.forward_fn([speech for speech, _, _ in batch])
+            except Exception as e:
+                with self._lock:
+                    self._errors += len(batch)
+                for _, future, _ in batch:
+                    future.set_exception(e)
+                continue
+
+            finished = time.perf_counter()
+            with self._lock:
+                self._requests += len(batch)
+                self._batches += 1
+                self._largest_batch = max(self._largest_batch, len(batch))
+                self._forward_total += finished - started
+                for _, _, queued in batch:
+                    self._wait_total += started - queued
+                    self._recent.append((finished, finished - queued))
+
+            for (_, future, queued), result in zip(batch, results):
+                future.timing = (started - queued, finished - started)
+                future.set_result(result)
+
+    def stats(self):
+        """Throughput and latency summary for this queue"""
+        with self._lock:
+            latencies = sorted(latency for _, latency in self._recent)
+            span = (self._recent[-1][0] - self._recent[0][0]) if len(self._recent) > 1 else 0.0
+            requests = self._requests
+            batches = self._batches
+
+            def percentile(p):
+                if not latencies:
+                    return None
+                index = min(len(latencies) - 1, int(round(p / 100.0 * (len(latencies) - 1))))
+                return round(latencies[index] * 1000, 2)
+
+            return {
+                "window_ms": self.max_wait * 1000,
+                "max_batch": self.max_batch,
+                "queue_depth": self._queue.qsize(),
+                "requests": requests,
+                "batches": batches,
+                "errors": self._errors,
+                "avg_batch_size": round(requests / batches, 2) if batches else 0,
+                "largest_batch": self._largest_batch,
+                "avg_queue_wait_ms": round(self._wait_total / requests * 1000, 2) if requests else 0,
+                "avg_forward_ms": round(self._forward_total / batches * 1000, 2) if batches else 0,
+                "latency_p50_ms": percentile(50),
+                "latency_p95_ms": percentile(95),
+                "latency_p99_ms": percentile(99),
+                "recent_throughput_rps": round((len(self._recent) - 1) / span, 2) if span > 0 else 0,
+                "uptime_s": round(time.time() - self._started, 1),
+            }
@@ -0,0 +1,369 @@
+"""Load test and benchmark a running phoneme server (10_phoneme or 12_phonics_backend).
+
+    python src/bench.py run --url http://localhost:5000                  # all scenarios
+    python src/bench.py run --scenarios analyze --models wav2vec2_lv60 --concurrency 1 8 32 --pid 1234
+    python src/bench.py compare bench-results/before.json bench-results/after.json
+
+Test clips are synthesized once with espeak-ng from the words of the
+server's catalog.json (one WAV per word x accent, kept in --clips-dir), so
+every run replays the same audio. Each scenario (analyze per model, tts,
+catalog) runs at every --concurrency level with that many closed-loop
+clients. A run records throughput, p50/p95/p99 latency and errors per
+scenario, model and concurrency level, the server's resident memory (summed
+over the process tree of --pid, e.g. the gunicorn master) and the backend of
+each model from /models, and writes it to a JSON file in --output-dir.
+`compare` lines two result files up and exits non-zero when throughput drops
+or p95 latency grows by more than --threshold, so it can gate a change.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+import uuid
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_CATALOG = os.path.join(SRC_DIR, "catalog.json")
+
+SCENARIOS = ("analyze", "tts", "catalog")
+# 10_phoneme names its accents, 12_phonics_backend uses language codes
+ACCENT_VOICES = {
+    "American": "en-us", "British": "en-gb",
+    "en-US": "en-us", "en-GB": "en-gb", "en-AU": "en-au", "en-IE": "en-ie", "en-IN": "en-in", "en-CA": "en-ca",
+}
+
+
+def catalog_plan(path):
+    """(words by accent, catalog GET paths) for a catalog.json of either project"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    words, paths = {}, []
+    if "levels" in data:
+        # 12_phonics_backend: levels -> categories -> sounds -> words, every accent
+        accents = [code for code in ACCENT_VOICES if code.startswith("en-")]
+        paths.append("/levels")
+        for level, categories in data["levels"].items():
+            paths.append("/categories?" + urllib.parse.urlencode({"level": level}))
+            for category, sounds in categories.items():
+                for accent in accents:
+                    query = urllib.parse.urlencode({"level": level, "category": category, "accent": accent})
+                    paths.append(f"/sounds?{query}")
+                    paths.extend(f"/sound/{index}/words?{query}" for index in range(len(sounds)))
+                for sound_data in sounds:
+                    for accent in accents:
+                        words.setdefault(accent, set()).update(sound_data["words"])
+    else:
+        # 10_phoneme: user modes -> accents -> patterns, phonemes in the words table
+        paths.append("/user-modes")
+        for user_mode, accents in data["pattern_sets"].items():
+            for accent, patterns in accents.items():
+                query = urllib.parse.urlencode({"user_mode": user_mode, "accent": accent})
+                paths.append(f"/patterns?{query}")
+                paths.extend(f"/pattern/{pattern_id}/words?{query}" for pattern_id in patterns)
+        for word, by_accent in data["words"].items():
+            for accent in by_accent:
+                words.setdefault(accent, set()).add(word)
+    return {accent: sorted(ws) for accent, ws in words.items()}, paths
+
+
+def synthesize_clips(words_by_accent, clips_dir, count, seed=0):
+    """A fixed sample of `count` (word, accent, wav bytes) clips, synthesized on first use"""
+    pairs = sorted((word, accent) for accent, words in words_by_accent.items() for word in words)
+    pairs = random.Random(seed).sample(pairs, min(count, len(pairs)))
+    os.makedirs(clips_dir, exist_ok=True)
+
+    clips = []
+    for word, accent in pairs:
+        path = os.path.join(clips_dir, f"{accent}-{word}.wav".replace("/", "_"))
+        if not os.path.exists(path):
+            subprocess.run(['espeak-ng', '-v', ACCENT_VOICES.get(accent, "en-us"), '-w', path, word],
+                           check=True, capture_output=True, timeout=10)
+        with open(path, "rb") as f:
+            clips.append((word, accent, f.read()))
+    return clips
+
+
+def multipart(fields, files):
+    """(body, content type) of a multipart/form-data request"""
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, data, content_type) in files.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+                     f'Content-Type: {content_type}\r\n\r\n'.encode() + data + b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode())
+    return b"".join(parts), f"multipart/form-data; boundary={boundary}"
+
+
+def fetch(url, data=None, headers=None, timeout=60):
+    """(status, body) of one request; status 0 when the connection itself failed"""
+    request = urllib.request.Request(url, data=data, headers=headers or {})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return response.status, response.read()
+    except urllib.error.HTTPError as e:
+        return e.code, e.read()
+    except (urllib.error.URLError, OSError):
+        return 0, b""
+
+
+def process_rss_mb(pid):
+    """Resident memory of `pid` and all its descendants in MB, or None if unavailable"""
+    if not pid or not os.path.isdir("/proc"):
+        return None
+    children, rss = {}, {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status") as f:
+                status = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        children.setdefault(int(status["PPid"]), []).append(int(entry))
+        rss[int(entry)] = int(status.get("VmRSS", "0 kB").split()[0])
+    if pid not in rss:
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, []))
+    return round(total / 1024, 1)
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    index = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return round(values[index] * 1000, 2)
+
+
+def run_load(send, concurrency, requests, pid=None):
+    """Issue `requests` calls of send(i) from `concurrency` clients; summary of the run"""
+    lock = threading.Lock()
+    counter = iter(range(requests))
+    latencies, statuses = [], {}
+    rss = {"start": process_rss_mb(pid), "peak": None}
+    done = threading.Event()
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            started = time.perf_counter()
+            status = send(i)
+            elapsed = time.perf_counter() - started
+            with lock:
+                statuses[status] = statuses.get(status, 0) + 1
+                if 200 <= status < 400:
+                    latencies.append(elapsed)
+
+    def sample_rss():
+        while not done.wait(0.25):
+            current = process_rss_mb(pid)
+            if current is not None:
+                rss["peak"] = max(rss["peak"] or 0, current)
+
+    sampler = threading.Thread(target=sample_rss, daemon=True)
+    sampler.start()
+    clients = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for thread in clients:
+        thread.start()
+    for thread in clients:
+        thread.join()
+    wall = time.perf_counter() - started
+    done.set()
+    sampler.join()
+
+    latencies.sort()
+    ok = len(latencies)
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": ok,
+        "errors": {str(status): n for status, n in sorted(statuses.items()) if not 200 <= status < 400},
+        "seconds": round(wall, 2),
+        "throughput_rps": round(ok / wall, 2) if wall > 0 else 0,
+        "latency_ms": {
+            "mean": round(sum(latencies) / ok * 1000, 2) if ok else None,
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+        },
+        "rss_mb": {"start": rss["start"], "peak": rss["peak"] or rss["start"]},
+    }
+
+
+def scenario_senders(args, clips, catalog_paths):
+    """(scenario, model, send(i) -> status) for every requested scenario"""
+    url = args.url.rstrip("/")
+    senders = []
+    if "analyze" in args.scenarios:
+        for model_id in args.models:
+            def send_analyze(i, model_id=model_id):
+                word, accent, wav = clips[i % len(clips)]
+                body, content_type = multipart(
+                    {"word": word, "accent": accent, "model": model_id, "mode": args.mode},
+                    {"audio": (f"{word}.wav", wav, "audio/wav")}
+                )
+                headers = {"Content-Type": content_type, "X-Client-Id": f"bench-{i % args.clients}"}
+                return fetch(f"{url}/analyze", body, headers, args.timeout)[0]
+            senders.append(("analyze", model_id, send_analyze))
+    if "tts" in args.scenarios:
+        def send_tts(i):
+            word, accent, _ = clips[i % len(clips)]
+            query = urllib.parse.urlencode({"text": word, "accent": accent})
+            return fetch(f"{url}/tts?{query}", timeout=args.timeout)[0]
+        senders.append(("tts", None, send_tts))
+    if "catalog" in args.scenarios:
+        def send_catalog(i):
+            return fetch(url + catalog_paths[i % len(catalog_paths)], timeout=args.timeout)[0]
+        senders.append(("catalog", None, send_catalog))
+    return senders
+
+
+def server_models(args):
+    """{model id: /models entry} of the server, or None if it does not answer"""
+    status, body = fetch(f"{args.url.rstrip('/')}/models", timeout=args.timeout)
+    return {model["id"]: model for model in json.loads(body)} if status == 200 else None
+
+
+def run(args):
+    words_by_accent, catalog_paths = catalog_plan(args.catalog)
+    clips = synthesize_clips(words_by_accent, args.clips_dir, args.clips)
+    print(f"✓ {len(clips)} clips in {args.clips_dir}, {len(catalog_paths)} catalog paths")
+
+    models = server_models(args)
+    if models is None:
+        raise SystemExit(f"✗ {args.url} is not answering /models")
+    if "analyze" in args.scenarios:
+        # Quantized twins (DEGRADE_BACKEND) are listed after the models they shadow
+        args.models = args.models or list(models)[:1]
+        unknown = [m for m in args.models if m not in models]
+        if unknown:
+            raise SystemExit(f"✗ Unknown models: {', '.join(unknown)} (server has {', '.join(models)})")
+
+    results = []
+    for scenario, model_id, send in scenario_senders(args, clips, catalog_paths):
+        # Untimed warm-up: lazy model loads and first espeak-ng calls
+        for i in range(args.warmup):
+            send(i)
+        backend = (server_models(args) or models).get(model_id, {}).get("backend") if model_id else None
+        for concurrency in args.concurrency:
+            summary = run_load(send, concurrency, args.requests, args.pid)
+            results.append({"scenario": scenario, "model": model_id, "backend": backend, **summary})
+            latency = summary["latency_ms"]
+            rss = summary["rss_mb"]["peak"]
+            print(f"  {scenario:<8} {model_id or '-':<18} c={concurrency:<3} {summary['throughput_rps']:8.2f} req/s  "
+                  f"p50 {latency['p50']} ms  p95 {latency['p95']} ms  p99 {latency['p99']} ms  "
+                  f"errors {summary['errors'] or 0}" + (f"  rss {rss} MB" if rss is not None else ""))
+
+    report = {
+        "label": args.label,
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "url": args.url,
+        "git": git_revision(),
+        "settings": {key: getattr(args, key) for key in
+                     ("scenarios", "models", "mode", "concurrency", "requests", "warmup", "clips", "clients")},
+        "models": list(models.values()),
+        "results": results,
+    }
+    os.makedirs(args.output_dir, exist_ok=True)
+    name = time.strftime("%Y%m%d-%H%M%S") + (f"-{args.label}" if args.label else "") + ".json"
+    path = os.path.join(args.output_dir, name)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Results written to {path}")
+    return 0
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SRC_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(args):
+    """Print per-result changes between two runs; 1 if any crossed --threshold"""
+    def load(path):
+        with open(path, encoding="utf-8") as f:
+            report = json.load(f)
+        return {(r["scenario"], r["model"], r["concurrency"]): r for r in report["results"]}
+
+    before, after = load(args.before), load(args.after)
+    regressions = 0
+    for key in sorted(before.keys() & after.keys(), key=lambda k: (k[0], k[1] or "", k[2])):
+        old, new = before[key], after[key]
+        rps_change = change(old["throughput_rps"], new["throughput_rps"])
+        p95_change = change(old["latency_ms"]["p95"], new["latency_ms"]["p95"])
+        regressed = ((rps_change is not None and -rps_change > args.threshold)
+                     or (p95_change is not None and p95_change > args.threshold))
+        regressions += regressed
+        scenario, model_id, concurrency = key
+        print(f"{'✗' if regressed else '✓'} {scenario:<8} {model_id or '-':<18} c={concurrency:<3} "
+              f"{old['throughput_rps']:.2f} -> {new['throughput_rps']:.2f} req/s ({format_change(rps_change)})  "
+              f"p95 {old['latency_ms']['p95']} -> {new['latency_ms']['p95']} ms ({format_change(p95_change)})")
+    for key in sorted(before.keys() ^ after.keys(), key=lambda k: (k[0], k[1] or "", k[2])):
+        print(f"  {key[0]} {key[1] or '-'} c={key[2]} only in {'before' if key in before else 'after'}")
+    return 1 if regressions else 0
+
+
+def change(old, new):
+    """Relative change new vs old in percent, None if either is missing"""
+    if not old or new is None:
+        return None
+    return (new - old) / old * 100
+
+
+def format_change(value):
+    return "n/a" if value is None else f"{value:+.1f}%"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test a phoneme server and compare benchmark runs")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    bench = sub.add_parser("run", help="Replay synthesized clips and catalog/TTS requests against a server")
+    bench.add_argument("--url", default="http://localhost:5000")
+    bench.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=SCENARIOS)
+    bench.add_argument("--models", nargs="+", default=[],
+                       help="models to run /analyze with (default: the first one the server lists)")
+    bench.add_argument("--mode", default="alignment", choices=("alignment", "gop"))
+    bench.add_argument("--concurrency", nargs="+", type=int, default=[1, 4, 16])
+    bench.add_argument("--requests", type=int, default=200, help="requests per scenario and concurrency level")
+    bench.add_argument("--warmup", type=int, default=5, help="untimed requests before each scenario")
+    bench.add_argument("--clients", type=int, default=64, help="distinct X-Client-Id values /analyze cycles through")
+    bench.add_argument("--timeout", type=float, default=60)
+    bench.add_argument("--catalog", default=DEFAULT_CATALOG, help="catalog.json to take words and paths from")
+    bench.add_argument("--clips", type=int, default=50, help="number of word x accent clips to replay")
+    bench.add_argument("--clips-dir", default=os.path.join("bench-results", "clips"))
+    bench.add_argument("--pid", type=int, help="server process (tree) whose RSS to sample")
+    bench.add_argument("--output-dir", default="bench-results")
+    bench.add_argument("--label", default="", help="suffix for the result file, e.g. onnx-int8")
+
+    diff = sub.add_parser("compare", help="Compare two result files")
+    diff.add_argument("before")
+    diff.add_argument("after")
+    diff.add_argument("--threshold", type=float, default=10.0,
+                      help="percent throughput drop or p95 growth counted as a regression")
+
+    args = parser.parse_args(argv)
+    return run(args) if args.command == "run" else compare(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
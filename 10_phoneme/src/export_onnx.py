@@ -0,0 +1,154 @@
+"""Export the wav2vec2 checkpoints to ONNX and check backend parity against fp32.
+
+    python src/export_onnx.py                      # export + validate every model
+    python src/export_onnx.py --models wav2vec2_lv60 --quantize
+    python src/export_onnx.py --validate-only --clips recordings/
+
+Validation decodes a fixed clip set with the fp32 torch model and with every
+other available backend (int8, onnx, onnx-int8) and reports how often the
+greedy CTC transcriptions agree, the mean phoneme similarity, the largest
+logit deviation and the per-clip latency. It exits non-zero when a backend's
+agreement falls below --min-agreement, so it can gate a deploy.
+"""
+import argparse
+import glob
+import io
+import os
+import subprocess
+import sys
+import time
+from difflib import SequenceMatcher
+
+import librosa
+import torch
+
+from backends import CHECKPOINTS, DEFAULT_ONNX_DIR, load_backend, load_torch_model, onnx_path, output_lengths
+
+# Synthesized when no --clips directory is given; fixed so runs are comparable
+VALIDATION_WORDS = [
+    ("cat", "en-us"), ("ship", "en-us"), ("three", "en-gb"), ("water", "en-us"), ("bird", "en-gb"),
+    ("queen", "en-us"), ("house", "en-gb"), ("judge", "en-us"), ("yellow", "en-gb"), ("thorough", "en-us"),
+]
+
+
+class _LogitsOnly(torch.nn.Module):
+    """Export wrapper so the graph has a single `logits` output"""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_values, attention_mask):
+        return self.model(input_values, attention_mask=attention_mask).logits
+
+
+def export(model_id, onnx_dir, quantize=False, opset=14):
+    os.makedirs(onnx_dir, exist_ok=True)
+    path = onnx_path(onnx_dir, model_id)
+    model = _LogitsOnly(load_torch_model(model_id))
+
+    input_values = torch.randn(1, 16000)
+    attention_mask = torch.ones(1, 16000, dtype=torch.long)
+    torch.onnx.export(
+        model, (input_values, attention_mask), path,
+        input_names=["input_values", "attention_mask"],
+        output_names=["logits"],
+        dynamic_axes={
+            "input_values": {0: "batch", 1: "samples"},
+            "attention_mask": {0: "batch", 1: "samples"},
+            "logits": {0: "batch", 1: "frames"},
+        },
+        opset_version=opset,
+        do_constant_folding=True,
+    )
+    print(f"✓ Exported {model_id} to {path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = onnx_path(onnx_dir, model_id, "onnx-int8")
+        quantize_dynamic(path, int8_path, weight_type=QuantType.QInt8)
+        print(f"✓ Quantized {model_id} to {int8_path}")
+
+
+def load_clips(clips_dir):
+    """16 kHz clips from a directory, or the synthesized VALIDATION_WORDS set"""
+    if clips_dir:
+        paths = sorted(glob.glob(os.path.join(clips_dir, "*.wav")))
+        if not paths:
+            raise SystemExit(f"No .wav files in {clips_dir}")
+        return [(os.path.basename(p), librosa.load(p, sr=16000)[0]) for p in paths]
+
+    clips = []
+    for word, voice in VALIDATION_WORDS:
+        wav = subprocess.run(['espeak-ng', '-v', voice, '--stdout', word],
+                             capture_output=True, check=True, timeout=10).stdout
+        clips.append((f"{word}-{voice}", librosa.load(io.BytesIO(wav), sr=16000)[0]))
+    return clips
+
+
+def run(processor, backend, clips):
+    """Greedy transcriptions, logits and mean latency (ms) of a backend over the clips"""
+    transcriptions, all_logits = [], []
+    started = time.perf_counter()
+    for _, speech in clips:
+        inputs = processor(speech, sampling_rate=16000, return_tensors="pt", return_attention_mask=True)
+        logits = backend(inputs.input_values, inputs.attention_mask)[0]
+        logits = logits[:int(output_lengths(backend.config, inputs.attention_mask.sum(-1))[0])]
+        all_logits.append(logits)
+        transcriptions.append(processor.batch_decode([torch.argmax(logits, dim=-1)])[0])
+    latency = (time.perf_counter() - started) / len(clips) * 1000
+    return transcriptions, all_logits, latency
+
+
+def validate(model_id, onnx_dir, clips, min_agreement):
+    """Compare every available backend with fp32; returns False if one is below min_agreement"""
+    processor, reference = load_backend(model_id, "torch")
+    ref_text, ref_logits, ref_ms = run(processor, reference, clips)
+    print(f"\n{model_id}: torch fp32 {ref_ms:.1f} ms/clip over {len(clips)} clips")
+
+    ok = True
+    for name in ("int8", "onnx", "onnx-int8"):
+        try:
+            _, backend = load_backend(model_id, name, onnx_dir)
+        except Exception as e:
+            print(f"  {name:<10} skipped ({e})")
+            continue
+
+        text, logits, ms = run(processor, backend, clips)
+        agree = sum(a == b for a, b in zip(text, ref_text)) / len(clips)
+        similarity = sum(SequenceMatcher(None, a, b).ratio() for a, b in zip(text, ref_text)) / len(clips)
+        max_diff = max(float((a - b).abs().max()) for a, b in zip(logits, ref_logits))
+        status = "ok" if agree >= min_agreement else "FAIL"
+        print(f"  {name:<10} {ms:7.1f} ms/clip  agreement {agree:.0%}  similarity {similarity:.3f}  "
+              f"max |Δlogit| {max_diff:.3f}  {status}")
+        for (clip, _), a, b in zip(clips, text, ref_text):
+            if a != b:
+                print(f"    {clip}: {b!r} -> {a!r}")
+        ok = ok and agree >= min_agreement
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Export wav2vec2 models to ONNX and validate backend parity")
+    parser.add_argument("--models", nargs="+", default=list(CHECKPOINTS), choices=list(CHECKPOINTS))
+    parser.add_argument("--output-dir", default=os.environ.get("ONNX_DIR", DEFAULT_ONNX_DIR))
+    parser.add_argument("--quantize", action="store_true", help="also write an int8 ONNX graph")
+    parser.add_argument("--opset", type=int, default=14)
+    parser.add_argument("--validate-only", action="store_true")
+    parser.add_argument("--clips", help="directory of .wav clips to validate on (default: synthesized words)")
+    parser.add_argument("--min-agreement", type=float, default=0.9,
+                        help="minimum share of clips whose transcription must match fp32")
+    args = parser.parse_args(argv)
+
+    if not args.validate_only:
+        for model_id in args.models:
+            export(model_id, args.output_dir, args.quantize, args.opset)
+
+    clips = load_clips(args.clips)
+    ok = all([validate(model_id, args.output_dir, clips, args.min_agreement) for model_id in args.models])
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
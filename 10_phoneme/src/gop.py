@@ -0,0 +1,120 @@
+"""Goodness of pronunciation (GOP) from CTC posteriors.
+
+Instead of scoring only the greedy transcription, the expected phonemes are
+forced-aligned against the model's frame log-posteriors with CTC Viterbi
+(vectorized over the label states, one NumPy step per frame). Each phoneme
+then gets the frames the model attributed to it, a confidence (geometric
+mean posterior of the expected token over those frames) and a GOP value
+(mean log-posterior margin against the best competing phoneme, <= 0).
+"""
+import numpy as np
+import torch
+
+NEG_INF = -np.inf
+
+
+def ctc_forced_align(log_probs, targets, blank=0):
+    """Most likely CTC state per frame for `targets`, or None if they do not fit
+
+    Returns an array with the target index of every frame (-1 for blank).
+    """
+    T = log_probs.shape[0]
+    S = 2 * len(targets) + 1
+    ext = np.full(S, blank, dtype=np.int64)
+    ext[1::2] = targets
+    emit = log_probs[:, ext]
+
+    # A state may skip the blank before it unless it repeats the previous label
+    can_skip = np.zeros(S, dtype=bool)
+    can_skip[2:] = (ext[2:] != blank) & (ext[2:] != ext[:-2])
+
+    alpha = np.full(S, NEG_INF)
+    alpha[0] = emit[0, 0]
+    if S > 1:
+        alpha[1] = emit[0, 1]
+    back = np.zeros((T, S), dtype=np.int8)
+    candidates = np.full((3, S), NEG_INF)
+    states = np.arange(S)
+    for t in range(1, T):
+        candidates[0] = alpha
+        candidates[1, 1:] = alpha[:-1]
+        candidates[2, 2:] = np.where(can_skip[2:], alpha[:-2], NEG_INF)
+        best = candidates.argmax(axis=0)
+        back[t] = best
+        alpha = candidates[best, states] + emit[t]
+
+    end = S - 1 if S == 1 or alpha[S - 1] >= alpha[S - 2] else S - 2
+    if not np.isfinite(alpha[end]):
+        return None
+
+    path = np.empty(T, dtype=np.int64)
+    s = end
+    for t in range(T - 1, -1, -1):
+        path[t] = s
+        s -= back[t, s]
+    return np.where(path % 2 == 1, (path - 1) // 2, -1)
+
+
+class GopScorer:
+    """Maps IPA phonemes onto a CTC tokenizer's vocabulary and scores them"""
+
+    def __init__(self, tokenizer, frame_seconds=0.02):
+        self.vocab = tokenizer.get_vocab()
+        self.blank = tokenizer.pad_token_id
+        self.frame_seconds = frame_seconds
+        self.special = sorted(set(tokenizer.all_special_ids))
+
+    def tokens_for(self, phoneme):
+        """Vocabulary ids spelling one phoneme, or None if it cannot be spelled"""
+        for candidate in (phoneme, phoneme.rstrip("ː")):
+            if candidate in self.vocab:
+                return [self.vocab[candidate]]
+        # e.g. a diphthong the vocabulary only has as separate vowels
+        chars = [ch for ch in phoneme if ch != "ː"]
+        if chars and all(ch in self.vocab for ch in chars):
+            return [self.vocab[ch] for ch in chars]
+        return None
+
+    def score(self, logits, phonemes):
+        """Per-phoneme confidence, GOP and timing for the expected phonemes"""
+        log_probs = torch.log_softmax(logits.float(), dim=-1).numpy()
+
+        targets, owners, unscored = [], [], []
+        for index, phoneme in enumerate(phonemes):
+            ids = self.tokens_for(phoneme)
+            if ids is None:
+                unscored.append(phoneme)
+                continue
+            targets.extend(ids)
+            owners.extend([index] * len(ids))
+
+        frames_of = None
+        if targets and len(log_probs):
+            frames_of = ctc_forced_align(log_probs, np.array(targets), self.blank)
+        if frames_of is None:
+            return {"score": 0, "aligned": False, "phonemes": [], "unscored": unscored}
+
+        # Best competing phoneme per frame, ignoring blank and special tokens
+        competitors = log_probs.copy()
+        competitors[:, self.special] = NEG_INF
+        best_other = competitors.max(axis=1)
+
+        targets = np.array(targets)
+        owners = np.array(owners)
+        results = []
+        for index, phoneme in enumerate(phonemes):
+            token_indices = np.flatnonzero(owners == index)
+            if not len(token_indices):
+                continue
+            frames = np.flatnonzero(np.isin(frames_of, token_indices))
+            target_lp = log_probs[frames, targets[frames_of[frames]]]
+            results.append({
+                "phoneme": phoneme,
+                "start": round(frames[0] * self.frame_seconds, 3),
+                "end": round((frames[-1] + 1) * self.frame_seconds, 3),
+                "confidence": round(float(np.exp(target_lp.mean())), 3),
+                "gop": round(float((target_lp - best_other[frames]).mean()), 3),
+            })
+
+        score = int(round(100 * np.mean([r["confidence"] for r in results]))) if results else 0
+        return {"score": score, "aligned": True, "phonemes": results, "unscored": unscored}
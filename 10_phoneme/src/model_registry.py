@@ -0,0 +1,136 @@
+"""On-demand model loading with a memory budget.
+
+ModelRegistry manages the server's MODELS dict: a model's backend is loaded
+the first time it is needed (or when preloaded explicitly), its footprint is
+recorded, and when the resident models exceed the configured budget the
+least recently used ones are unloaded. Processors (tokenizer + feature
+extractor) are tiny and stay loaded so transcriptions can always be decoded.
+"""
+import gc
+import os
+import threading
+import time
+
+
+def process_rss_bytes():
+    """Resident set size of this process (Linux), or None if unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class ModelRegistry:
+    """Lazy loader and LRU evictor for the entries of MODELS"""
+
+    def __init__(self, models, loader, budget_bytes=0):
+        # loader(model_id) -> (processor, backend, backend_name)
+        self.models = models
+        self.loader = loader
+        self.budget_bytes = budget_bytes
+
+        self._lock = threading.Lock()
+        self._load_locks = {model_id: threading.Lock() for model_id in models}
+        self._last_used = {}
+        self._sizes = {}
+        self._loads = 0
+        self._evictions = 0
+
+    def is_loaded(self, model_id):
+        return self.models[model_id]["model"] is not None
+
+    def get(self, model_id):
+        """Return the backend for model_id, loading it (and evicting others) if needed"""
+        model_data = self.models[model_id]
+        model = model_data["model"]
+        if model is None:
+            with self._load_locks[model_id]:
+                model = model_data["model"]
+                if model is None:
+                    model = self._load(model_id)
+        with self._lock:
+            self._last_used[model_id] = time.time()
+        return model
+
+    def preload(self, model_ids):
+        for model_id in model_ids:
+            try:
+                self.get(model_id)
+            except Exception as e:
+                print(f"✗ Preloading {model_id} failed: {e}")
+
+    def _load(self, model_id):
+        model_data = self.models[model_id]
+        # Make room first if we know how big this model was last time
+        self._evict_for(self._sizes.get(model_id, 0), keep=model_id)
+
+        started = time.time()
+        processor, model, backend = self.loader(model_id)
+        size = model.memory_bytes()
+        with self._lock:
+            model_data["processor"] = processor
+            model_data["model"] = model
+            model_data["backend"] = backend
+            self._sizes[model_id] = size
+            self._last_used[model_id] = time.time()
+            self._loads += 1
+        print(f"✓ {model_data['name']} loaded ({backend}, {size / 2**20:.0f} MB, {time.time() - started:.1f}s)")
+
+        self._evict_for(0, keep=model_id)
+        return model
+
+    def _resident_bytes(self):
+        return sum(self._sizes.get(m, 0) for m in self.models if self.is_loaded(m))
+
+    def _evict_for(self, incoming, keep):
+        if not self.budget_bytes:
+            return
+        while True:
+            with self._lock:
+                if self._resident_bytes() + incoming <= self.budget_bytes:
+                    return
+                candidates = [m for m in self.models if m != keep and self.is_loaded(m)]
+                if not candidates:
+                    return
+                victim = min(candidates, key=lambda m: self._last_used.get(m, 0))
+            self.unload(victim)
+
+    def unload(self, model_id):
+        """Drop a model's backend; in-flight batches keep their reference until done"""
+        with self._lock:
+            model_data = self.models[model_id]
+            if model_data["model"] is None:
+                return False
+            model_data["model"] = None
+            self._evictions += 1
+        gc.collect()
+        print(f"✓ {model_data['name']} unloaded")
+        return True
+
+    def status(self):
+        """Per-model loaded state, backend and footprint; `base` is set on degraded twins"""
+        with self._lock:
+            return [{
+                "id": model_id,
+                "name": model_data["name"],
+                "base": model_data.get("base"),
+                "loaded": model_data["model"] is not None,
+                "backend": model_data["backend"],
+                "memory_mb": round(self._sizes[model_id] / 2**20, 1) if model_id in self._sizes else None,
+                "last_used": self._last_used.get(model_id),
+            } for model_id, model_data in self.models.items()]
+
+    def stats(self):
+        with self._lock:
+            resident = self._resident_bytes()
+            loads, evictions = self._loads, self._evictions
+        rss = process_rss_bytes()
+        return {
+            "budget_mb": round(self.budget_bytes / 2**20, 1) if self.budget_bytes else None,
+            "resident_mb": round(resident / 2**20, 1),
+            "process_rss_mb": round(rss / 2**20, 1) if rss else None,
+            "loads": loads,
+            "evictions": evictions,
+            "models": self.status(),
+        }
@@ -0,0 +1,118 @@
+"""Content-addressed cache for synthesized TTS audio.
+
+Keys are a hash of everything that determines the espeak-ng output (text or
+phoneme string, voice, speed, word gap, and the engine: the libespeak-ng pool
+and the espeak-ng subprocess frame their WAVs differently), so the same key
+always names the same WAV bytes and doubles as a strong ETag. Entries live in a bounded
+in-memory LRU and, when a directory is configured, in an on-disk tier that
+survives restarts and is shared by every worker on the node.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+
+class TTSCache:
+    """Two-tier (memory LRU + optional disk) store of WAV bytes"""
+
+    def __init__(self, max_entries=1024, max_bytes=64 * 1024 * 1024, disk_dir=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir or None
+
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(text, voice, speed, gap, engine):
+        """Stable key for one synthesis request"""
+        raw = "\x1f".join([text, voice, str(speed), str(gap), engine])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, key[:2], f"{key}.wav")
+
+    def get(self, key):
+        """Return cached WAV bytes or None"""
+        with self._lock:
+            wav = self._entries.get(key)
+            if wav is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return wav
+
+        if self.disk_dir:
+            try:
+                with open(self._disk_path(key), "rb") as f:
+                    wav = f.read()
+            except OSError:
+                wav = None
+            if wav:
+                self._remember(key, wav)
+                with self._lock:
+                    self._disk_hits += 1
+                return wav
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, key, wav):
+        """Store WAV bytes in memory and, if enabled, on disk"""
+        self._remember(key, wav)
+        if self.disk_dir:
+            path = self._disk_path(key)
+            if not os.path.exists(path):
+                self._write_disk(path, wav)
+
+    def _remember(self, key, wav):
+        if len(wav) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+            self._entries[key] = wav
+            self._bytes += len(wav)
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+                self._evictions += 1
+
+    def _write_disk(self, path, wav):
+        # Write to a temp file and rename so readers never see a partial WAV
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                f.write(wav)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"✗ TTS cache write failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._disk_hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "disk_dir": self.disk_dir,
+                "hits": self._hits,
+                "disk_hits": self._disk_hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "hit_rate": round((self._hits + self._disk_hits) / lookups, 3) if lookups else 0,
+            }
@@ -0,0 +1,185 @@
+"""On-disk word catalog with hot reload, and its precompiled responses.
+
+The catalog (src/catalog.json) is validated against a small schema when it is
+loaded and turned into a snapshot by the server: the data plus every body the
+navigation endpoints (levels, categories, sounds, patterns and their word
+lists) can return, serialized once with a strong ETag derived from its bytes.
+Serving is a dict lookup, and a client that revalidates with If-None-Match
+gets an empty 304.
+
+CatalogStore re-reads the file when its mtime/size changes (checked at most
+every `check_interval` seconds, by whichever request comes first) and swaps
+the whole snapshot in one assignment. Requests hold on to the snapshot they
+started with, so a reload never drops or mixes in-flight requests, and a file
+that fails to parse or validate is reported while the old catalog stays live.
+Write a new catalog to a temporary file and rename it over the old one.
+"""
+import hashlib
+import json
+import os
+import threading
+import time
+
+
+class CatalogError(ValueError):
+    """The catalog file does not match the schema"""
+
+
+def validate(value, schema, path="catalog"):
+    """Check decoded JSON against `schema`; raises CatalogError naming the bad path
+
+    A schema is a type (str, int, ...), [item_schema] for a list, {str: schema}
+    for an object with arbitrary keys, {"key": schema, ...} for an object with
+    exactly those keys, or a tuple of alternatives.
+    """
+    if isinstance(schema, tuple):
+        errors = []
+        for alternative in schema:
+            try:
+                return validate(value, alternative, path)
+            except CatalogError as e:
+                errors.append(str(e))
+        raise CatalogError(" or ".join(errors))
+
+    if isinstance(schema, type):
+        if not isinstance(value, schema) or (schema is int and isinstance(value, bool)):
+            raise CatalogError(f"{path}: expected {schema.__name__}, got {type(value).__name__}")
+        return
+
+    if isinstance(schema, list):
+        if not isinstance(value, list):
+            raise CatalogError(f"{path}: expected a list")
+        for index, item in enumerate(value):
+            validate(item, schema[0], f"{path}[{index}]")
+        return
+
+    if not isinstance(value, dict):
+        raise CatalogError(f"{path}: expected an object")
+    if str in schema:
+        for key, item in value.items():
+            validate(item, schema[str], f"{path}.{key}")
+        return
+    missing = set(schema) - set(value)
+    unknown = set(value) - set(schema)
+    if missing or unknown:
+        raise CatalogError(f"{path}: missing {sorted(missing)}, unknown {sorted(unknown)}")
+    for key, item_schema in schema.items():
+        validate(value[key], item_schema, f"{path}.{key}")
+
+
+class CompiledCatalog:
+    """Serialized JSON bodies and their ETags, keyed by endpoint and parameters"""
+
+    def __init__(self, dumps):
+        # dumps(payload) -> str; the servers pass app.json.dumps so bodies match jsonify()
+        self.dumps = dumps
+        self._responses = {}
+
+    def add(self, key, payload):
+        body = self.dumps(payload).encode("utf-8")
+        etag = hashlib.sha256(body).hexdigest()[:32]
+        self._responses[key] = (body, etag)
+
+    def get(self, key):
+        """(body, etag) for a key, or None if the catalog has no such response"""
+        return self._responses.get(key)
+
+    def __contains__(self, key):
+        return key in self._responses
+
+    def __len__(self):
+        return len(self._responses)
+
+    def stats(self):
+        return {
+            "responses": len(self._responses),
+            "bytes": sum(len(body) for body, _ in self._responses.values()),
+        }
+
+
+class CatalogSnapshot:
+    """One loaded catalog: its validated data and precompiled responses"""
+
+    def __init__(self, data, responses):
+        self.data = data
+        self.responses = responses
+
+
+class CatalogStore:
+    """The current catalog snapshot, reloaded atomically when its file changes"""
+
+    def __init__(self, path, build, check_interval=2.0):
+        # build(raw JSON) -> CatalogSnapshot; raises CatalogError if the data is invalid
+        self.path = path
+        self.build = build
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._checked = time.monotonic()
+        self.reloads = 0
+        self.failures = 0
+        self.last_error = None
+        self.current = self._load()
+
+    def _stamp(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _load(self):
+        stamp = self._stamp()
+        with open(self.path, "rb") as f:
+            data = f.read()
+        try:
+            raw = json.loads(data)
+        except ValueError as e:
+            raise CatalogError(f"{self.path}: {e}") from None
+        snapshot = self.build(raw)
+        self.stamp = stamp
+        self.version = hashlib.sha256(data).hexdigest()[:12]
+        self.loaded_at = time.time()
+        return snapshot
+
+    def get(self):
+        """The live snapshot, after picking up file changes at most every check_interval s"""
+        if self.check_interval and time.monotonic() - self._checked >= self.check_interval:
+            self.reload_if_changed()
+        return self.current
+
+    def reload_if_changed(self):
+        """Load the file if it changed; True if a new snapshot went live"""
+        # Only one thread checks; the others carry on with the current snapshot
+        if not self._lock.acquire(blocking=False):
+            return False
+        try:
+            self._checked = time.monotonic()
+            try:
+                if self._stamp() == self.stamp:
+                    return False
+                self.current = self._load()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                # Do not retry the same broken file on every check
+                try:
+                    self.stamp = self._stamp()
+                except OSError:
+                    pass
+                print(f"✗ Catalog reload failed, keeping version {self.version}: {e}")
+                return False
+            self.reloads += 1
+            self.last_error = None
+            print(f"✓ Catalog reloaded from {self.path} (version {self.version})")
+            return True
+        finally:
+            self._lock.release()
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "version": self.version,
+            "loaded_at": self.loaded_at,
+            "reloads": self.reloads,
+            "failures": self.failures,
+            "last_error": self.last_error,
+            **self.current.responses.stats(),
+        }
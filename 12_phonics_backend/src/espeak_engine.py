@@ -0,0 +1,284 @@
+"""Resident espeak-ng workers driven through libespeak-ng.
+
+Forking `espeak-ng` per request pays for process start-up and voice loading
+every time. EspeakPool instead keeps one worker process per voice with the
+library initialised and the voice selected; synthesis and phonemization jobs
+go to that worker over a pipe and come back as WAV bytes / phoneme strings.
+libespeak-ng keeps global state, so workers are processes rather than threads.
+
+Workers are this module run as a script (`python espeak_engine.py <voice>`),
+started with subprocess: they exec a fresh interpreter instead of forking
+the multi-threaded server, and never import the server's main module. The
+pool keeps each worker's Popen handle and kills a worker that does not
+answer in time; the next job for that voice starts a new one.
+
+If the library cannot be found (or a worker fails) callers fall back to the
+`espeak-ng` subprocess path.
+"""
+import ctypes
+import ctypes.util
+import io
+import os
+import pickle
+import select
+import struct
+import subprocess
+import sys
+import threading
+import time
+import wave
+
+# speak_lib.h constants
+AUDIO_OUTPUT_SYNCHRONOUS = 2
+POS_CHARACTER = 1
+ESPEAK_CHARS_UTF8 = 1
+ESPEAK_PHONEMES = 0x100
+ESPEAK_ENDPAUSE = 0x1000
+ESPEAK_RATE = 1
+ESPEAK_WORDGAP = 7
+EE_OK = 0
+
+SYNTH_CALLBACK = ctypes.CFUNCTYPE(ctypes.c_int, ctypes.POINTER(ctypes.c_short), ctypes.c_int, ctypes.c_void_p)
+
+
+def find_library():
+    """Path of libespeak-ng, or None if it is not installed"""
+    return os.environ.get("ESPEAK_LIBRARY") or ctypes.util.find_library("espeak-ng")
+
+
+class _Binding:
+    """libespeak-ng loaded in the current (worker) process with one voice selected"""
+
+    def __init__(self, voice):
+        lib = ctypes.CDLL(find_library())
+        lib.espeak_Initialize.restype = ctypes.c_int
+        lib.espeak_Initialize.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_char_p, ctypes.c_int]
+        lib.espeak_SetSynthCallback.argtypes = [SYNTH_CALLBACK]
+        lib.espeak_SetVoiceByName.argtypes = [ctypes.c_char_p]
+        lib.espeak_SetParameter.argtypes = [ctypes.c_int, ctypes.c_int, ctypes.c_int]
+        lib.espeak_Synth.argtypes = [
+            ctypes.c_void_p, ctypes.c_size_t, ctypes.c_uint, ctypes.c_int,
+            ctypes.c_uint, ctypes.c_uint, ctypes.POINTER(ctypes.c_uint), ctypes.c_void_p
+        ]
+        lib.espeak_TextToPhonemes.restype = ctypes.c_char_p
+        lib.espeak_TextToPhonemes.argtypes = [ctypes.POINTER(ctypes.c_void_p), ctypes.c_int, ctypes.c_int]
+
+        self.sample_rate = lib.espeak_Initialize(AUDIO_OUTPUT_SYNCHRONOUS, 0, None, 0)
+        if self.sample_rate <= 0:
+            raise RuntimeError("espeak_Initialize failed")
+        if lib.espeak_SetVoiceByName(voice.encode()) != EE_OK:
+            raise RuntimeError(f"espeak-ng voice {voice!r} not found")
+
+        self._lib = lib
+        self._chunks = []
+        # Keep a reference so the callback is not garbage collected
+        self._callback = SYNTH_CALLBACK(self._on_samples)
+        lib.espeak_SetSynthCallback(self._callback)
+
+    def _on_samples(self, wav, numsamples, events):
+        if wav and numsamples > 0:
+            self._chunks.append(ctypes.string_at(wav, numsamples * 2))
+        return 0
+
+    def synthesize(self, text, speed, gap):
+        """Render text (which may contain [[phonemes]]) to 16-bit mono WAV bytes"""
+        self._lib.espeak_SetParameter(ESPEAK_RATE, int(speed), 0)
+        self._lib.espeak_SetParameter(ESPEAK_WORDGAP, int(gap), 0)
+
+        self._chunks = []
+        data = text.encode("utf-8") + b"\0"
+        flags = ESPEAK_CHARS_UTF8 | ESPEAK_PHONEMES | ESPEAK_ENDPAUSE
+        if self._lib.espeak_Synth(data, len(data), 0, POS_CHARACTER, 0, flags, None, None) != EE_OK:
+            raise RuntimeError("espeak_Synth failed")
+        self._lib.espeak_Synchronize()
+
+        out = io.BytesIO()
+        with wave.open(out, "wb") as w:
+            w.setnchannels(1)
+            w.setsampwidth(2)
+            w.setframerate(self.sample_rate)
+            w.writeframes(b"".join(self._chunks))
+        self._chunks = []
+        return out.getvalue()
+
+    def phonemize(self, text):
+        """eSpeak phoneme mnemonics for text, as printed by `espeak-ng -x`"""
+        if not text:
+            return ""
+        buf = ctypes.create_string_buffer(text.encode("utf-8"))
+        ptr = ctypes.c_void_p(ctypes.addressof(buf))
+        clauses = []
+        # Each call consumes one clause and advances ptr; it is NULL at the end
+        while ptr.value:
+            position = ptr.value
+            phonemes = self._lib.espeak_TextToPhonemes(ctypes.byref(ptr), ESPEAK_CHARS_UTF8, 0)
+            if phonemes:
+                clauses.append(phonemes.decode("utf-8").strip())
+            if ptr.value == position:
+                break
+        return " ".join(c for c in clauses if c)
+
+
+class WorkerError(RuntimeError):
+    """A worker died, failed to start or stopped answering; it gets replaced"""
+
+
+def _frame(message):
+    """Length-prefixed pickle of one request or reply"""
+    data = pickle.dumps(message, protocol=pickle.HIGHEST_PROTOCOL)
+    return struct.pack("<I", len(data)) + data
+
+
+def _read_exact(fd, size, deadline):
+    """`size` bytes from a pipe, or WorkerError once `deadline` (monotonic) passes"""
+    chunks = []
+    while size:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not select.select([fd], [], [], remaining)[0]:
+            raise WorkerError("espeak-ng worker did not answer in time")
+        chunk = os.read(fd, size)
+        if not chunk:
+            raise WorkerError("espeak-ng worker exited")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def _serve(voice):
+    """Worker main: answer (method, args) frames on stdin with (ok, result) frames"""
+    requests = sys.stdin.buffer
+    # Replies get their own copy of stdout; anything the library prints goes to stderr
+    replies = os.fdopen(os.dup(1), "wb")
+    os.dup2(2, 1)
+
+    def reply(ok, result):
+        replies.write(_frame((ok, result)))
+        replies.flush()
+
+    try:
+        binding = _Binding(voice)
+    except Exception as e:
+        reply(False, f"{type(e).__name__}: {e}")
+        return 1
+    # Ready: the first reply a worker sends
+    reply(True, None)
+
+    jobs = {"synthesize": binding.synthesize, "phonemize": binding.phonemize}
+    while True:
+        header = requests.read(4)
+        if len(header) < 4:
+            return 0
+        method, args = pickle.loads(requests.read(struct.unpack("<I", header)[0]))
+        try:
+            reply(True, jobs[method](*args))
+        except Exception as e:
+            reply(False, f"{type(e).__name__}: {e}")
+
+
+class _Worker:
+    """One worker process for one voice; jobs run one at a time"""
+
+    def __init__(self, voice, library):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), voice],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            env=dict(os.environ, ESPEAK_LIBRARY=library)
+        )
+        self._lock = threading.Lock()
+        self._ready = False
+
+    def call(self, method, args, timeout):
+        deadline = time.monotonic() + timeout
+        if not self._lock.acquire(timeout=timeout):
+            raise TimeoutError("espeak-ng worker busy")
+        try:
+            if not self._ready:
+                self._reply(deadline, WorkerError)
+                self._ready = True
+            try:
+                self.process.stdin.write(_frame((method, args)))
+                self.process.stdin.flush()
+            except OSError as e:
+                raise WorkerError(f"espeak-ng worker exited: {e}") from e
+            return self._reply(deadline, RuntimeError)
+        finally:
+            self._lock.release()
+
+    def _reply(self, deadline, error):
+        fd = self.process.stdout.fileno()
+        size, = struct.unpack("<I", _read_exact(fd, 4, deadline))
+        ok, result = pickle.loads(_read_exact(fd, size, deadline))
+        if not ok:
+            raise error(result)
+        return result
+
+    def kill(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+class EspeakPool:
+    """One resident libespeak-ng worker process per voice"""
+
+    def __init__(self, voices=(), enabled=True):
+        self.library = find_library() if enabled else None
+        self.available = bool(self.library)
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._jobs = 0
+        self._failures = 0
+        if self.available:
+            # Start the workers now so the first request doesn't pay for voice loading
+            for voice in voices:
+                self._worker(voice)
+
+    def _worker(self, voice):
+        with self._lock:
+            worker = self._workers.get(voice)
+            if worker is None:
+                worker = _Worker(voice, self.library)
+                self._workers[voice] = worker
+            return worker
+
+    def _run(self, voice, method, args, timeout):
+        worker = self._worker(voice)
+        try:
+            result = worker.call(method, args, timeout)
+        except WorkerError:
+            with self._lock:
+                self._failures += 1
+                # A dead or hung worker is replaced on the next job
+                if self._workers.get(voice) is worker:
+                    del self._workers[voice]
+            worker.kill()
+            raise
+        except Exception:
+            with self._lock:
+                self._failures += 1
+            raise
+        with self._lock:
+            self._jobs += 1
+        return result
+
+    def synthesize(self, text, voice, speed, gap, timeout=10):
+        """WAV bytes for text spoken with `voice`"""
+        return self._run(voice, "synthesize", (text, speed, gap), timeout)
+
+    def phonemize(self, text, voice, timeout=5):
+        """eSpeak phoneme mnemonics for text in `voice`"""
+        return self._run(voice, "phonemize", (text,), timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "available": self.available,
+                "library": self.library,
+                "voices": sorted(self._workers),
+                "jobs": self._jobs,
+                "failures": self._failures,
+            }
+
+
+if __name__ == "__main__":
+    sys.exit(_serve(sys.argv[1]))
@@ -0,0 +1,61 @@
+"""Pre-fork serving: load the models once, fork workers that share them.
+
+    gunicorn -c src/gunicorn.conf.py
+    WEB_ASGI=1 gunicorn -c src/gunicorn.conf.py    # asgi:app on uvicorn workers
+
+The app is imported in the master (preload_app), which loads every model in
+PRELOAD_MODELS (all but the degraded twins if unset), finishes the optional
+catalog warm-up and freezes the garbage collector before forking WEB_WORKERS
+workers. Workers share the weight pages copy-on-write instead of each
+holding a copy; each one restarts its own batcher threads and espeak-ng pool
+after the fork.
+"""
+import glob
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+chdir = os.path.dirname(os.path.abspath(__file__))
+wsgi_app = "server:app"
+preload_app = True
+
+workers = int(os.environ.get("WEB_WORKERS", os.cpu_count() or 1))
+# Threads let concurrent requests in one worker share a batched forward pass;
+# keep them above ADMISSION_MAX_ACTIVE + ADMISSION_MAX_QUEUE so the admission
+# queue, not the socket backlog, decides who waits
+threads = int(os.environ.get("WEB_THREADS", "32"))
+timeout = int(os.environ.get("WEB_TIMEOUT", "120"))
+
+# Async serving (see asgi.py): the event loop answers catalog/TTS/static
+# requests while inference runs on the app's own bounded thread pool
+if os.environ.get("WEB_ASGI", "0") == "1":
+    wsgi_app = "asgi:app"
+    worker_class = "uvicorn.workers.UvicornWorker"
+
+# Prometheus multiprocess mode (see metrics.py): workers write their samples
+# to files in this directory and /metrics sums them. It must be set before the
+# app is imported, and samples left over from an earlier run are dropped.
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    for stale in glob.glob(os.path.join(os.environ["PROMETHEUS_MULTIPROC_DIR"], "*.db")):
+        os.remove(stale)
+else:
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="phoneme-metrics-")
+
+
+def when_ready(server):
+    import server as app_module
+
+    app_module.prepare_for_fork()
+    server.log.info("Models loaded in master, forking %d workers", workers)
+
+
+def post_fork(server, worker):
+    import server as app_module
+
+    app_module.after_fork(workers)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+
+    multiprocess.mark_process_dead(worker.pid)
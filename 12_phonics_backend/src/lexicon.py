@@ -0,0 +1,229 @@
+"""Compiled phoneme lexicon shared read-only by every server worker.
+
+The lexicon is a small versioned SQLite file mapping (word, accent name) to
+eSpeak phonemes and IPA. Workers open it read-only and memory-mapped, so they
+all share the same pages and nobody has to shell out to espeak-ng for words
+it already covers. Build it offline (the Dockerfile does this at image build):
+
+    python src/lexicon.py build [--output PATH] [--extra-words CATALOG_JSON ...]
+    python src/lexicon.py info [PATH]
+
+Besides the catalog's levels, the build adds the curated `words` table of
+src/curated_words.json (a copy of 10_phoneme's, so the image build has it)
+unless --extra-words names other tables. Curated rows keep their hand-written
+IPA verbatim, since it tells accents apart where the eSpeak phonemes do not
+(American "goʊ" and British "gəʊ" are both "g @U").
+"""
+import argparse
+import ast
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from phonemes import espeak_to_ipa, espeak_version, get_espeak_phonemes_for_words
+
+# Bump when the table layout or the IPA of espeak-ng rows (espeak_to_ipa's
+# output) changes; curated rows are stored verbatim and not covered by this.
+# Servers ignore lexicons of another format
+LEXICON_FORMAT = 2
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_PATH = os.path.join(SRC_DIR, "lexicon.sqlite")
+DEFAULT_CATALOG = os.path.join(SRC_DIR, "catalog.json")
+DEFAULT_EXTRA_WORDS = os.path.join(SRC_DIR, "curated_words.json")
+
+
+class Lexicon:
+    """Read-only (word, accent name) -> {espeak, ipa} lookups"""
+
+    def __init__(self, path, mmap_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.mmap_bytes = mmap_bytes
+        self._uri = Path(path).absolute().as_uri() + "?mode=ro&immutable=1"
+        self._local = threading.local()
+
+        self.meta = dict(self._conn().execute("SELECT key, value FROM meta"))
+        if self.meta.get("format") != str(LEXICON_FORMAT):
+            raise ValueError(f"format {self.meta.get('format')}, expected {LEXICON_FORMAT}")
+
+    @classmethod
+    def open(cls, path):
+        """Open the lexicon at `path`, or return None if it is missing or unusable"""
+        if not os.path.exists(path):
+            print(f"✗ No lexicon at {path} (phonemes will come from espeak-ng)")
+            return None
+        try:
+            lexicon = cls(path)
+        except Exception as e:
+            print(f"✗ Lexicon {path} not usable: {e}")
+            return None
+
+        runtime = espeak_version()
+        if runtime and lexicon.meta.get("espeak_version") != runtime:
+            print(f"✗ Lexicon was built with {lexicon.meta.get('espeak_version')}, running {runtime}")
+        print(f"✓ Lexicon loaded ({lexicon.meta.get('entries')} entries, built {lexicon.meta.get('built_at')})")
+        return lexicon
+
+    def _conn(self):
+        # sqlite3 connections are per thread; each one maps the same file
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self._uri, uri=True, check_same_thread=False)
+            conn.execute(f"PRAGMA mmap_size={int(self.mmap_bytes)}")
+            self._local.conn = conn
+        return conn
+
+    def reopen(self):
+        """Drop inherited connections (call in a freshly forked worker)"""
+        self._local = threading.local()
+
+    def lookup(self, word, accent_name):
+        """Return {"espeak", "ipa"} for a word, or None if the lexicon lacks it"""
+        row = self._conn().execute(
+            "SELECT espeak, ipa FROM entries WHERE word = ? AND accent = ?",
+            (word, accent_name)
+        ).fetchone()
+        if row is None:
+            return None
+        return {"espeak": row[0], "ipa": row[1]}
+
+
+def load_literal(path, name):
+    """Read a top-level literal (e.g. ACCENT_MAP) from a Python file without importing it"""
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(
+            isinstance(target, ast.Name) and target.id == name for target in node.targets
+        ):
+            return ast.literal_eval(node.value)
+    raise KeyError(f"{name} not found in {path}")
+
+
+def load_catalog(path):
+    """Decoded catalog.json (see catalog.py)"""
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def catalog_words(phonics_data):
+    """Every word (and bare sound) a learner can select in the catalog's levels"""
+    words = set()
+    for categories in phonics_data.values():
+        for sounds in categories.values():
+            for sound_data in sounds:
+                words.add(sound_data["sound"])
+                words.update(sound_data["words"])
+    return sorted(words)
+
+
+def build_entries(server_path, catalog_path, extra_paths=(), threads=8):
+    """Resolve the catalog with espeak-ng, then add curated word tables it does not cover"""
+    accents = load_literal(server_path, "ACCENT_MAP")
+    words = catalog_words(load_catalog(catalog_path)["levels"])
+
+    # One batched espeak-ng call per accent
+    def resolve(accent_code):
+        return accents[accent_code], get_espeak_phonemes_for_words(words, accent_code)
+
+    entries = {}
+    failed = 0
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for accent_name, resolved in pool.map(resolve, accents):
+            for word in words:
+                espeak = resolved.get(word)
+                if espeak:
+                    entries[(word, accent_name)] = (espeak, espeak_to_ipa(espeak), "espeak-ng")
+                else:
+                    failed += 1
+
+    # Curated tables: IPA as written, not regenerated with espeak_to_ipa
+    for path in extra_paths:
+        source = f"words:{os.path.relpath(path)}"
+        for word, by_accent in load_catalog(path)["words"].items():
+            for accent_name, data in by_accent.items():
+                entries.setdefault((word, accent_name), (data["espeak"], data["ipa"], source))
+
+    return entries, failed
+
+
+def write_lexicon(path, entries):
+    """Write entries to `path` atomically (readers keep their old mapping until reopened)"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        conn.executescript("""
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            CREATE TABLE entries (
+                word TEXT NOT NULL,
+                accent TEXT NOT NULL,
+                espeak TEXT NOT NULL,
+                ipa TEXT NOT NULL,
+                source TEXT NOT NULL,
+                PRIMARY KEY (word, accent)
+            ) WITHOUT ROWID;
+        """)
+        conn.executemany(
+            "INSERT INTO entries VALUES (?, ?, ?, ?, ?)",
+            [(word, accent, *values) for (word, accent), values in sorted(entries.items())]
+        )
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("format", str(LEXICON_FORMAT)),
+            ("built_at", time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())),
+            ("espeak_version", espeak_version() or "unknown"),
+            ("entries", str(len(entries))),
+        ])
+        conn.commit()
+        conn.execute("VACUUM")
+        conn.close()
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build or inspect the compiled phoneme lexicon")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Resolve the catalog with espeak-ng and write the lexicon")
+    build.add_argument("--output", default=DEFAULT_PATH)
+    build.add_argument("--server", default=os.path.join(SRC_DIR, "server.py"),
+                       help="server.py to read ACCENT_MAP from")
+    build.add_argument("--catalog", default=DEFAULT_CATALOG, help="catalog.json to read the levels from")
+    build.add_argument("--extra-words", action="append", metavar="CATALOG_JSON",
+                       help="also include the words table of another catalog (default: curated_words.json)")
+    build.add_argument("--threads", type=int, default=8)
+
+    info = sub.add_parser("info", help="Print lexicon metadata")
+    info.add_argument("path", nargs="?", default=DEFAULT_PATH)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        started = time.time()
+        extra_words = args.extra_words
+        if extra_words is None:
+            extra_words = [DEFAULT_EXTRA_WORDS] if os.path.exists(DEFAULT_EXTRA_WORDS) else []
+        entries, failed = build_entries(args.server, args.catalog, extra_words, args.threads)
+        write_lexicon(args.output, entries)
+        print(f"✓ Wrote {len(entries)} entries to {args.output} "
+              f"({failed} espeak-ng failures) in {time.time() - started:.1f}s")
+        return 1 if not entries else 0
+
+    lexicon = Lexicon(args.path)
+    for key, value in sorted(lexicon.meta.items()):
+        print(f"{key}: {value}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
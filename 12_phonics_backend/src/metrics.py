@@ -0,0 +1,137 @@
+"""Prometheus metrics for the hot paths, and per-request stage timing.
+
+GET /metrics returns the Prometheus text format:
+
+    phoneme_analyze_requests_total{model,accent,mode,status}
+    phoneme_analyze_seconds{model,accent}          whole /analyze request
+    phoneme_analyze_stage_seconds{stage,model}     queue, decode_audio, prepare,
+                                                   batch_wait, forward, ensemble_forward,
+                                                   ctc_decode, phonemes, scoring, gop
+    phoneme_admission_rejected_total{reason}
+    phoneme_admission_active / _queued             gauges, summed over workers
+    phoneme_analysis_cache_total{result}           hit, miss
+    phoneme_tts_requests_total{result}             hit, miss, not_modified
+    phoneme_espeak_calls_total{kind,engine,outcome}
+    phoneme_espeak_seconds{kind,engine}            kind tts/phonemes, engine pool/subprocess
+
+Label values come from fixed sets (configured models, known accents, stage
+names), never straight from the request, so clients cannot create series.
+Under gunicorn each worker writes its samples to PROMETHEUS_MULTIPROC_DIR
+(gunicorn.conf.py sets one up) and /metrics adds them up, so whichever
+worker answers the scrape reports the whole server.
+"""
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+)
+
+# Request and stage latencies span sub-millisecond lookups to multi-second forwards
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+ANALYZE_REQUESTS = Counter(
+    "phoneme_analyze_requests_total", "Finished /analyze requests",
+    ["model", "accent", "mode", "status"])
+ANALYZE_SECONDS = Histogram(
+    "phoneme_analyze_seconds", "Time spent in /analyze, admission wait included",
+    ["model", "accent"], buckets=BUCKETS)
+ANALYZE_STAGE_SECONDS = Histogram(
+    "phoneme_analyze_stage_seconds", "Time spent in each stage of /analyze",
+    ["stage", "model"], buckets=BUCKETS)
+
+ADMISSION_REJECTED = Counter(
+    "phoneme_admission_rejected_total", "Inference requests turned away by admission control",
+    ["reason"])
+ADMISSION_ACTIVE = Gauge(
+    "phoneme_admission_active", "Analyses holding an inference slot", multiprocess_mode="livesum")
+ADMISSION_QUEUED = Gauge(
+    "phoneme_admission_queued", "Analyses waiting for an inference slot", multiprocess_mode="livesum")
+
+ANALYSIS_CACHE_LOOKUPS = Counter(
+    "phoneme_analysis_cache_total", "Analysis cache lookups by outcome",
+    ["result"])
+TTS_REQUESTS = Counter(
+    "phoneme_tts_requests_total", "TTS audio requests by cache outcome",
+    ["result"])
+ESPEAK_CALLS = Counter(
+    "phoneme_espeak_calls_total", "espeak-ng synthesis and phonemization calls",
+    ["kind", "engine", "outcome"])
+ESPEAK_SECONDS = Histogram(
+    "phoneme_espeak_seconds", "Time spent in espeak-ng calls",
+    ["kind", "engine"], buckets=BUCKETS)
+
+
+def label(value, known, other="other"):
+    """`value` if it is one of `known`, else `other`"""
+    return value if value in known else other
+
+
+class StageTimer:
+    """Stage durations and labels of one /analyze request, for the metrics and Server-Timing"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []
+        # Filled in by the handler once the request is parsed
+        self.labels = {"model": "none", "accent": "none", "mode": "none"}
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        self.stages.append((name, seconds))
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def observe(self, status):
+        """Count the finished request and add it to the stage and total histograms"""
+        model, accent, mode = self.labels["model"], self.labels["accent"], self.labels["mode"]
+        ANALYZE_REQUESTS.labels(model, accent, mode, str(status)).inc()
+        for name, seconds in self.stages:
+            ANALYZE_STAGE_SECONDS.labels(name, model).observe(seconds)
+        ANALYZE_SECONDS.labels(model, accent).observe(self.elapsed())
+
+    def server_timing(self):
+        """Server-Timing header value: every stage plus the total, in ms"""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.stages]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def track_admission(controller):
+    """Publish an AdmissionController's slot and queue counts to the gauges"""
+    ADMISSION_ACTIVE.set(controller.active)
+    ADMISSION_QUEUED.set(controller.queued)
+
+
+@contextmanager
+def espeak_call(kind, engine):
+    """Count and time one espeak-ng call; the body sets outcome["ok"] = False on failure"""
+    outcome = {"ok": True}
+    started = time.perf_counter()
+    try:
+        yield outcome
+    except Exception:
+        outcome["ok"] = False
+        raise
+    finally:
+        ESPEAK_CALLS.labels(kind, engine, "ok" if outcome["ok"] else "failed").inc()
+        ESPEAK_SECONDS.labels(kind, engine).observe(time.perf_counter() - started)
+
+
+def render():
+    """(body, content type) of the current metrics, summed over all workers if forked"""
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
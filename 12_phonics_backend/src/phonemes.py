@@ -0,0 +1,222 @@
+"""eSpeak phoneme helpers shared by the server and the lexicon builder"""
+import re
+import subprocess
+from functools import lru_cache
+
+# eSpeak to IPA mapping
+ESPEAK_TO_IPA = {
+    "eI": "eɪ",
+    "aI": "aɪ",
+    "aU": "aʊ",
+    "OI": "ɔɪ",
+    "O:": "ɔː",
+    "o": "oʊ",
+    "@": "ə",
+    "3:": "ɜː",
+    "I": "ɪ",
+    "i:": "iː",
+    "U": "ʊ",
+    "u:": "uː",
+    "A": "ʌ",
+    "æ": "æ",
+    "A:": "ɑː",
+    "E": "ɛ",
+    "e": "e",
+    "p": "p",
+    "b": "b",
+    "t": "t",
+    "d": "d",
+    "k": "k",
+    "g": "ɡ",
+    "m": "m",
+    "n": "n",
+    "N": "ŋ",
+    "f": "f",
+    "v": "v",
+    "T": "θ",
+    "D": "ð",
+    "s": "s",
+    "z": "z",
+    "S": "ʃ",
+    "Z": "ʒ",
+    "tS": "tʃ",
+    "dZ": "dʒ",
+    "h": "h",
+    "l": "l",
+    "r": "ɹ",
+    "j": "j",
+    "w": "w",
+    # Further eSpeak English phonemes, as printed by `espeak-ng -x`
+    "a": "æ",
+    "a#": "ɐ",
+    "aa": "ɑː",
+    "A@": "ɑː",
+    "V": "ʌ",
+    "0": "ɒ",
+    "O": "ɔ",
+    "O@": "ɔː",
+    "o@": "ɔː",
+    "oU": "oʊ",
+    "@U": "əʊ",
+    "e@": "eə",
+    "i@": "ɪə",
+    "U@": "ʊə",
+    "aI@": "aɪə",
+    "aU@": "aʊə",
+    "i": "i",
+    "I#": "ᵻ",
+    "3": "ɚ",
+    "@L": "əl",
+    "r-": "ɹ",
+    "t#": "ɾ",
+    "?": "ʔ",
+    "x": "x",
+    "C": "ç",
+}
+
+# IPA the wav2vec2 models emit, matched as itself so IPA input tokenizes too
+IPA_UNITS = ("eɪ", "aɪ", "aʊ", "ɔɪ", "oʊ", "əʊ", "eə", "ɪə", "ʊə", "tʃ", "dʒ")
+IPA_SYMBOLS = "iyɪᵻeɛæaəɚɜɝɐʌɑɒɔoʊupbtdkɡgʔmnŋfvθðszʃʒçxhɹrɾlɫjw"
+
+# eSpeak and IPA stress marks, length marks, and marks that are not phonemes
+# (word/syllable boundaries, pauses, and eSpeak's variant digits as in "I2")
+STRESS_MARKS = {"'": "ˈ", ",": "ˌ", "ˈ": "ˈ", "ˌ": "ˌ"}
+LENGTH_MARKS = (":", "ː")
+IGNORED = set(" \t%=_|.-!#25")
+
+
+class PhonemeTokenizer:
+    """Longest-match eSpeak/IPA tokenizer compiled once from a symbol -> IPA table"""
+
+    def __init__(self, table, passthrough=IPA_UNITS + tuple(IPA_SYMBOLS)):
+        self.table = dict(table)
+        for symbol in set(table.values()) | set(passthrough):
+            self.table.setdefault(symbol, symbol)
+        # Regex alternation takes the first alternative that matches, so
+        # listing longer symbols first makes it a longest-match scan.
+        # "\n" separates the strings of a batch.
+        alternatives = sorted(self.table, key=len, reverse=True)
+        self._pattern = re.compile("|".join(map(re.escape, alternatives)) + "|\n|.")
+
+    def tokenize_many(self, seqs, stress=False):
+        """IPA phoneme tokens for each string, from a single regex scan of the batch"""
+        seqs = ["" if not seq or seq == "N/A" else seq.replace("\n", " ") for seq in seqs]
+        results = [[]]
+        mark = ""
+        for symbol in self._pattern.findall("\n".join(seqs)):
+            tokens = results[-1]
+            if symbol == "\n":
+                results.append([])
+                mark = ""
+            elif symbol in LENGTH_MARKS:
+                if tokens and not tokens[-1].endswith("ː"):
+                    tokens[-1] += "ː"
+            elif symbol in STRESS_MARKS:
+                mark = STRESS_MARKS[symbol] if stress else ""
+            elif symbol not in IGNORED:
+                tokens.append(mark + self.table.get(symbol, symbol))
+                mark = ""
+        return results
+
+    def tokenize(self, seq, stress=False):
+        return self.tokenize_many([seq], stress)[0]
+
+    def to_ipa_many(self, seqs, stress=False):
+        """IPA strings for a batch of eSpeak strings ("N/A" for empty ones)"""
+        return [
+            "".join(tokens) if seq and seq != "N/A" else "N/A"
+            for seq, tokens in zip(seqs, self.tokenize_many(seqs, stress))
+        ]
+
+
+TOKENIZER = PhonemeTokenizer(ESPEAK_TO_IPA)
+
+# Map frontend accent codes to espeak-ng voices
+ESPEAK_VOICES = {
+    "en-GB": "en-gb",
+    "en-US": "en-us",
+    "en-AU": "en-au",
+    "en-IE": "en-ie",
+    "en-IN": "en-in",
+    "en-CA": "en-ca"
+}
+
+@lru_cache(maxsize=8192)
+def espeak_to_ipa(espeak_seq):
+    """Convert eSpeak phonemes (spaced or as printed by espeak-ng -x) to IPA"""
+    return TOKENIZER.to_ipa_many([espeak_seq])[0]
+
+def espeak_to_ipa_many(espeak_seqs):
+    """espeak_to_ipa for a batch of strings"""
+    return TOKENIZER.to_ipa_many(list(espeak_seqs))
+
+def get_espeak_phonemes_for_word(word, accent_code, pool=None):
+    """Get eSpeak phonemes for a word using espeak-ng (via `pool` when one is available)"""
+    voice = ESPEAK_VOICES.get(accent_code, "en-us")
+    
+    if pool is not None and pool.available:
+        try:
+            return re.sub(r'[\[\]]', '', pool.phonemize(word, voice)) or None
+        except Exception:
+            pass
+    
+    try:
+        # Use espeak-ng with phoneme output (-x flag)
+        result = subprocess.run(
+            ['espeak-ng', '-x', '-v', voice, word],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=5
+        )
+        # Extract phonemes (remove brackets and clean)
+        phonemes = result.stdout.strip()
+        # Remove brackets if present
+        phonemes = re.sub(r'[\[\]]', '', phonemes)
+        return phonemes
+    except subprocess.TimeoutExpired:
+        return None
+    except Exception as e:
+        return None
+
+def get_espeak_phonemes_for_words(words, accent_code, pool=None):
+    """Get eSpeak phonemes for many words in one voice: {word: phonemes or None}
+    
+    Without a worker pool the words are sent as one multi-line stdin batch to a
+    single espeak-ng process instead of one process per word.
+    """
+    voice = ESPEAK_VOICES.get(accent_code, "en-us")
+    words = list(words)
+    if not words:
+        return {}
+    
+    if pool is not None and pool.available:
+        return {word: get_espeak_phonemes_for_word(word, accent_code, pool) for word in words}
+    
+    try:
+        # One word per line, each closed as its own sentence so -x prints one line per word
+        result = subprocess.run(
+            ['espeak-ng', '-q', '-x', '-v', voice],
+            input="".join(f"{word}.\n" for word in words),
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=5 + 0.05 * len(words)
+        )
+        lines = [re.sub(r'[\[\]]', '', line).strip() for line in result.stdout.splitlines()]
+        lines = [line for line in lines if line]
+        if len(lines) == len(words):
+            return dict(zip(words, lines))
+    except Exception:
+        pass
+    
+    # Output did not line up with the input; resolve the words one by one
+    return {word: get_espeak_phonemes_for_word(word, accent_code) for word in words}
+
+def espeak_version():
+    """Version line of the installed espeak-ng, or None if it is missing"""
+    try:
+        result = subprocess.run(['espeak-ng', '--version'], capture_output=True, text=True, timeout=5)
+        return result.stdout.strip() or None
+    except Exception:
+        return None
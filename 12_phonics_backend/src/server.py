@@ -1,200 +1,196 @@
 from flask import Flask, request, jsonify, send_file
-import librosa
+from flask_sock import Sock
 import torch
-from transformers import Wav2Vec2Processor, Wav2Vec2ForCTC
-from difflib import SequenceMatcher
 import subprocess
 import os
-import re
+import io
+import gc
+import json
+import math
+import struct
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from functools import partial
+from backends import DEFAULT_ONNX_DIR, load_backend, output_lengths
+from batching import MicroBatcher
+from model_registry import ModelRegistry
+from tts_cache import TTSCache
+from espeak_engine import EspeakPool
+from phonemes import ESPEAK_VOICES, TOKENIZER, espeak_to_ipa, get_espeak_phonemes_for_word, get_espeak_phonemes_for_words
+from lexicon import Lexicon, DEFAULT_PATH as DEFAULT_LEXICON_PATH
+from streaming import StreamDecoder, pcm16_to_float
+from vad import prepare_speech
+from audio_decode import decode_audio
+from alignment import PhonemeAligner
+from gop import GopScorer
+from admission import AdmissionController, Rejected
+from analysis_cache import AnalysisCache
+from metrics import ADMISSION_REJECTED, ANALYSIS_CACHE_LOOKUPS, TTS_REQUESTS, StageTimer, espeak_call, label, track_admission
+from metrics import render as render_metrics
+from catalog import CatalogError, CatalogSnapshot, CatalogStore, CompiledCatalog, validate
 
 app = Flask(__name__, static_folder='static', static_url_path='')
+sock = Sock(app)
 
 # Load eSpeak wav2vec2 models
+# "model" holds the inference backend (see backends.py): torch, int8, onnx or onnx-int8
 MODELS = {
     "wav2vec2_lv60": {
         "name": "Wav2Vec2 LV-60 eSpeak",
+        "backend": None,
         "processor": None,
-        "model": None
+        "model": None,
+        "batcher": None
     },
     "wav2vec2_xlsr53": {
         "name": "Wav2Vec2 XLSR-53 eSpeak",
+        "backend": None,
         "processor": None,
-        "model": None
+        "model": None,
+        "batcher": None
     }
 }
 
-try:
-    MODELS["wav2vec2_lv60"]["processor"] = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-lv-60-espeak-cv-ft")
-    MODELS["wav2vec2_lv60"]["model"] = Wav2Vec2ForCTC.from_pretrained("facebook/wav2vec2-lv-60-espeak-cv-ft")
-    print("✓ Wav2Vec2 LV-60 eSpeak loaded")
-except Exception as e:
-    print(f"✗ Wav2Vec2 LV-60 load failed: {e}")
-
-try:
-    MODELS["wav2vec2_xlsr53"]["processor"] = Wav2Vec2Processor.from_pretrained("facebook/wav2vec2-xlsr-53-espeak-cv-ft")
-    MODELS["wav2vec2_xlsr53"]["model"] = Wav2Vec2ForCTC.from_pretrained("facebook/wav2vec2-xlsr-53-espeak-cv-ft")
-    print("✓ Wav2Vec2 XLSR-53 eSpeak loaded")
-except Exception as e:
-    print(f"✗ Wav2Vec2 XLSR-53 load failed: {e}")
-
-# eSpeak to IPA mapping
-ESPEAK_TO_IPA = {
-    "eI": "eɪ",
-    "aI": "aɪ",
-    "aU": "aʊ",
-    "OI": "ɔɪ",
-    "O:": "ɔː",
-    "o": "oʊ",
-    "@": "ə",
-    "3:": "ɜː",
-    "I": "ɪ",
-    "i:": "iː",
-    "U": "ʊ",
-    "u:": "uː",
-    "A": "ʌ",
-    "æ": "æ",
-    "A:": "ɑː",
-    "E": "ɛ",
-    "e": "e",
-    "p": "p",
-    "b": "b",
-    "t": "t",
-    "d": "d",
-    "k": "k",
-    "g": "ɡ",
-    "m": "m",
-    "n": "n",
-    "N": "ŋ",
-    "f": "f",
-    "v": "v",
-    "T": "θ",
-    "D": "ð",
-    "s": "s",
-    "z": "z",
-    "S": "ʃ",
-    "Z": "ʒ",
-    "tS": "tʃ",
-    "dZ": "dʒ",
-    "h": "h",
-    "l": "l",
-    "r": "ɹ",
-    "j": "j",
-    "w": "w",
-}
+# Under load /analyze can switch to a quantized twin of the requested model:
+# with DEGRADE_BACKEND=int8 every model gets a "<model_id>_int8" sibling
+DEGRADE_BACKEND = os.environ.get("DEGRADE_BACKEND", "")
+DEGRADE_AT = float(os.environ.get("DEGRADE_AT", "0.5"))
+if DEGRADE_BACKEND:
+    for model_id in list(MODELS):
+        twin_id = f"{model_id}_{DEGRADE_BACKEND.replace('-', '_')}"
+        MODELS[twin_id] = dict(MODELS[model_id], name=f"{MODELS[model_id]['name']} ({DEGRADE_BACKEND})", base=model_id)
+        MODELS[model_id]["degraded"] = twin_id
 
-# Phonics data structure matching frontend
-# Structure: PHONICS_DATA[level][category][sound_index] = {sound, ipa, es, words}
-PHONICS_DATA = {
-    "Basic": {
-        "Single Consonants": [
-            {"sound": "b", "ipa": "/b/", "es": {"en-GB": "b", "en-US": "b", "en-AU": "b", "en-IE": "b", "en-IN": "b", "en-CA": "b"}, "words": ["bat", "ball", "cab", "bed", "box"]},
-            {"sound": "c", "ipa": "/k/", "es": {"en-GB": "k", "en-US": "k", "en-AU": "k", "en-IE": "k", "en-IN": "k", "en-CA": "k"}, "words": ["cat", "cup", "can", "car", "cut"]},
-            {"sound": "d", "ipa": "/d/", "es": {"en-GB": "d", "en-US": "d", "en-AU": "d", "en-IE": "d", "en-IN": "d", "en-CA": "d"}, "words": ["dog", "red", "hand", "dad", "duck"]},
-            {"sound": "f", "ipa": "/f/", "es": {"en-GB": "f", "en-US": "f", "en-AU": "f", "en-IE": "f", "en-IN": "f", "en-CA": "f"}, "words": ["fish", "fun", "leaf", "fan", "fox"]},
-            {"sound": "g", "ipa": "/ɡ/", "es": {"en-GB": "g", "en-US": "g", "en-AU": "g", "en-IE": "g", "en-IN": "g", "en-CA": "g"}, "words": ["go", "big", "bag", "gun", "gum"]},
-            {"sound": "h", "ipa": "/h/", "es": {"en-GB": "h", "en-US": "h", "en-AU": "h", "en-IE": "h", "en-IN": "h", "en-CA": "h"}, "words": ["hat", "hot", "hen", "hop", "hug"]},
-            {"sound": "j", "ipa": "/dʒ/", "es": {"en-GB": "dZ", "en-US": "dZ", "en-AU": "dZ", "en-IE": "dZ", "en-IN": "dZ", "en-CA": "dZ"}, "words": ["jam", "jet", "jar", "jump", "joy"]},
-            {"sound": "k", "ipa": "/k/", "es": {"en-GB": "k", "en-US": "k", "en-AU": "k", "en-IE": "k", "en-IN": "k", "en-CA": "k"}, "words": ["kite", "key", "book", "kid", "kit"]},
-            {"sound": "l", "ipa": "/l/", "es": {"en-GB": "l", "en-US": "l", "en-AU": "l", "en-IE": "l", "en-IN": "l", "en-CA": "l"}, "words": ["lip", "leg", "ball", "log", "lap"]},
-            {"sound": "m", "ipa": "/m/", "es": {"en-GB": "m", "en-US": "m", "en-AU": "m", "en-IE": "m", "en-IN": "m", "en-CA": "m"}, "words": ["man", "mum", "moon", "map", "mat"]},
-            {"sound": "n", "ipa": "/n/", "es": {"en-GB": "n", "en-US": "n", "en-AU": "n", "en-IE": "n", "en-IN": "n", "en-CA": "n"}, "words": ["net", "sun", "pen", "nut", "nap"]},
-            {"sound": "p", "ipa": "/p/", "es": {"en-GB": "p", "en-US": "p", "en-AU": "p", "en-IE": "p", "en-IN": "p", "en-CA": "p"}, "words": ["pen", "cap", "pig", "pan", "pot"]},
-            {"sound": "r", "ipa": {"en-GB": "/ɑː/", "en-US": "/ɹ/", "en-AU": "/ɑː/", "en-IE": "/ɑː/", "en-IN": "/ɹ/", "en-CA": "/ɹ/"}, "es": {"en-GB": "A:", "en-US": "r", "en-AU": "A:", "en-IE": "A:", "en-IN": "r", "en-CA": "r"}, "words": ["red", "run", "car", "rat", "rug"]},
-            {"sound": "s", "ipa": "/s/", "es": {"en-GB": "s", "en-US": "s", "en-AU": "s", "en-IE": "s", "en-IN": "s", "en-CA": "s"}, "words": ["sun", "sock", "bus", "sit", "sat"]},
-            {"sound": "t", "ipa": "/t/", "es": {"en-GB": "t", "en-US": "t", "en-AU": "t", "en-IE": "t", "en-IN": "t", "en-CA": "t"}, "words": ["top", "cat", "ten", "tap", "tub"]},
-            {"sound": "v", "ipa": "/v/", "es": {"en-GB": "v", "en-US": "v", "en-AU": "v", "en-IE": "v", "en-IN": "v", "en-CA": "v"}, "words": ["van", "vet", "five", "vine", "vote"]},
-            {"sound": "w", "ipa": "/w/", "es": {"en-GB": "w", "en-US": "w", "en-AU": "w", "en-IE": "w", "en-IN": "w", "en-CA": "w"}, "words": ["wet", "win", "cow", "web", "wig"]},
-            {"sound": "x", "ipa": "/ks/", "es": {"en-GB": "ks", "en-US": "ks", "en-AU": "ks", "en-IE": "ks", "en-IN": "ks", "en-CA": "ks"}, "words": ["box", "fox", "six", "ax", "mix"]},
-            {"sound": "y", "ipa": "/j/", "es": {"en-GB": "j", "en-US": "j", "en-AU": "j", "en-IE": "j", "en-IN": "j", "en-CA": "j"}, "words": ["yes", "yellow", "yum", "yam", "yak"]},
-            {"sound": "z", "ipa": "/z/", "es": {"en-GB": "z", "en-US": "z", "en-AU": "z", "en-IE": "z", "en-IN": "z", "en-CA": "z"}, "words": ["zip", "zoo", "buzz", "zap", "zen"]}
-        ],
-        "Consonant Digraphs": [
-            {"sound": "ch", "ipa": "/tʃ/", "es": {"en-GB": "tS", "en-US": "tS", "en-AU": "tS", "en-IE": "tS", "en-IN": "tS", "en-CA": "tS"}, "words": ["chip", "chair", "lunch", "chat", "chin"]},
-            {"sound": "ck", "ipa": "/k/", "es": {"en-GB": "k", "en-US": "k", "en-AU": "k", "en-IE": "k", "en-IN": "k", "en-CA": "k"}, "words": ["duck", "clock", "sock", "back", "pack"]},
-            {"sound": "ng", "ipa": "/ŋ/", "es": {"en-GB": "N", "en-US": "N", "en-AU": "N", "en-IE": "N", "en-IN": "N", "en-CA": "N"}, "words": ["ring", "sing", "long", "song", "wing"]},
-            {"sound": "nk", "ipa": "/ŋk/", "es": {"en-GB": "Nk", "en-US": "Nk", "en-AU": "Nk", "en-IE": "Nk", "en-IN": "Nk", "en-CA": "Nk"}, "words": ["bank", "sink", "think", "tank", "wink"]},
-            {"sound": "qu", "ipa": "/kw/", "es": {"en-GB": "kw", "en-US": "kw", "en-AU": "kw", "en-IE": "kw", "en-IN": "kw", "en-CA": "kw"}, "words": ["queen", "quick", "quiz", "quilt", "quit"]},
-            {"sound": "sh", "ipa": "/ʃ/", "es": {"en-GB": "S", "en-US": "S", "en-AU": "S", "en-IE": "S", "en-IN": "S", "en-CA": "S"}, "words": ["ship", "fish", "shop", "shell", "shut"]},
-            {"sound": "th", "ipa": "/θ/ /ð/", "es": {"en-GB": "T @", "en-US": "T @", "en-AU": "T @", "en-IE": "T @", "en-IN": "T @", "en-CA": "T @"}, "words": ["thin", "this", "bath", "that", "then"]}
-        ],
-        "Single Vowels": [
-            {"sound": "a", "ipa": "/æ/", "es": {"en-GB": "a", "en-US": "a", "en-AU": "a", "en-IE": "a", "en-IN": "a", "en-CA": "a"}, "words": ["ant", "apple", "cat", "hat", "map"]},
-            {"sound": "e", "ipa": "/ɛ/", "es": {"en-GB": "E", "en-US": "E", "en-AU": "E", "en-IE": "E", "en-IN": "E", "en-CA": "E"}, "words": ["egg", "bed", "pen", "red", "net"]},
-            {"sound": "i", "ipa": "/ɪ/", "es": {"en-GB": "I", "en-US": "I", "en-AU": "I", "en-IE": "I", "en-IN": "I", "en-CA": "I"}, "words": ["in", "sit", "pig", "pin", "hit"]},
-            {"sound": "o", "ipa": "/ɒ/", "es": {"en-GB": "O", "en-US": "O", "en-AU": "O", "en-IE": "O", "en-IN": "O", "en-CA": "O"}, "words": ["on", "hot", "dog", "pot", "top"]},
-            {"sound": "u", "ipa": "/ʌ/", "es": {"en-GB": "U", "en-US": "U", "en-AU": "U", "en-IE": "U", "en-IN": "U", "en-CA": "U"}, "words": ["up", "sun", "cup", "bug", "rug"]}
-        ],
-        "Vowel Digraphs": [
-            {"sound": "ai", "ipa": "/eɪ/", "es": {"en-GB": "eI", "en-US": "eI", "en-AU": "eI", "en-IE": "eI", "en-IN": "eI", "en-CA": "eI"}, "words": ["snail", "rain", "train", "paint", "tail"]},
-            {"sound": "au", "ipa": "/ɔː/", "es": {"en-GB": "O:", "en-US": "O:", "en-AU": "O:", "en-IE": "O:", "en-IN": "O:", "en-CA": "O:"}, "words": ["haul", "cause", "pause", "fault", "launch"]},
-            {"sound": "aw", "ipa": {"en-GB": "/ɔː/", "en-US": "/ɔ/", "en-AU": "/ɔː/", "en-IE": "/ɔː/", "en-IN": "/ɔ/", "en-CA": "/ɔ/"}, "es": {"en-GB": "O:", "en-US": "O", "en-AU": "O:", "en-IE": "O:", "en-IN": "O", "en-CA": "O"}, "words": ["yawn", "paw", "claw", "draw", "straw"]},
-            {"sound": "ay", "ipa": "/eɪ/", "es": {"en-GB": "eI", "en-US": "eI", "en-AU": "eI", "en-IE": "eI", "en-IN": "eI", "en-CA": "eI"}, "words": ["day", "play", "stay", "say", "way"]},
-            {"sound": "ea", "ipa": "/iː/", "es": {"en-GB": "i:", "en-US": "i:", "en-AU": "i:", "en-IE": "i:", "en-IN": "i:", "en-CA": "i:"}, "words": ["tea", "meat", "seat", "beach", "leaf"]},
-            {"sound": "ea", "ipa": "/ɛ/", "es": {"en-GB": "E", "en-US": "E", "en-AU": "E", "en-IE": "E", "en-IN": "E", "en-CA": "E"}, "words": ["bread", "weather", "head", "dead", "spread"]},
-            {"sound": "ee", "ipa": "/iː/", "es": {"en-GB": "i:", "en-US": "i:", "en-AU": "i:", "en-IE": "i:", "en-IN": "i:", "en-CA": "i:"}, "words": ["see", "tree", "green", "bee", "seed"]},
-            {"sound": "ew", "ipa": "/uː/", "es": {"en-GB": "u:", "en-US": "u:", "en-AU": "u:", "en-IE": "u:", "en-IN": "u:", "en-CA": "u:"}, "words": ["chew", "few", "new", "dew", "flew"]},
-            {"sound": "ie", "ipa": "/aɪ/", "es": {"en-GB": "aI", "en-US": "aI", "en-AU": "aI", "en-IE": "aI", "en-IN": "aI", "en-CA": "aI"}, "words": ["tie", "pie", "die", "lie", "cried"]},
-            {"sound": "oa", "ipa": "/əʊ/", "es": {"en-GB": "@U", "en-US": "@U", "en-AU": "@U", "en-IE": "@U", "en-IN": "@U", "en-CA": "@U"}, "words": ["goat", "road", "boat", "coat", "load"]},
-            {"sound": "oi", "ipa": "/ɔɪ/", "es": {"en-GB": "OI", "en-US": "OI", "en-AU": "OI", "en-IE": "OI", "en-IN": "OI", "en-CA": "OI"}, "words": ["spoil", "coin", "noise", "join", "point"]},
-            {"sound": "oo", "ipa": "/uː/", "es": {"en-GB": "u:", "en-US": "u:", "en-AU": "u:", "en-IE": "u:", "en-IN": "u:", "en-CA": "u:"}, "words": ["zoo", "moon", "food", "room", "cool"]},
-            {"sound": "oo", "ipa": "/ʊ/", "es": {"en-GB": "U", "en-US": "U", "en-AU": "U", "en-IE": "U", "en-IN": "U", "en-CA": "U"}, "words": ["book", "look", "foot", "good", "wood"]},
-            {"sound": "ou", "ipa": "/aʊ/", "es": {"en-GB": "aU", "en-US": "aU", "en-AU": "aU", "en-IE": "aU", "en-IN": "aU", "en-CA": "aU"}, "words": ["out", "shout", "cloud", "house", "mouse"]},
-            {"sound": "ow", "ipa": {"en-GB": "/əʊ/", "en-US": "/aʊ/", "en-AU": "/əʊ/", "en-IE": "/əʊ/", "en-IN": "/aʊ/", "en-CA": "/aʊ/"}, "es": {"en-GB": "@U", "en-US": "aU", "en-AU": "@U", "en-IE": "@U", "en-IN": "aU", "en-CA": "aU"}, "words": ["brown", "cow", "down", "town", "how"]},
-            {"sound": "oy", "ipa": "/ɔɪ/", "es": {"en-GB": "OI", "en-US": "OI", "en-AU": "OI", "en-IE": "OI", "en-IN": "OI", "en-CA": "OI"}, "words": ["boy", "toy", "coin", "joy", "soy"]}
-        ],
-        "Trigraphs": [
-            {"sound": "igh", "ipa": "/aɪ/", "es": {"en-GB": "aI", "en-US": "aI", "en-AU": "aI", "en-IE": "aI", "en-IN": "aI", "en-CA": "aI"}, "words": ["high", "night", "light", "right", "bright"]}
-        ],
-        "R-controlled Vowels": [
-            {"sound": "air", "ipa": {"en-GB": "/ɛə/", "en-US": "/ɛɹ/", "en-AU": "/ɛə/", "en-IE": "/ɛə/", "en-IN": "/ɛɹ/", "en-CA": "/ɛɹ/"}, "es": {"en-GB": "e@", "en-US": "e r", "en-AU": "e@", "en-IE": "e@", "en-IN": "e r", "en-CA": "e r"}, "words": ["hair", "fair", "chair", "pair", "stair"]},
-            {"sound": "ar", "ipa": {"en-GB": "/ɑː/", "en-US": "/ɑɹ/", "en-AU": "/ɑː/", "en-IE": "/ɑː/", "en-IN": "/ɑɹ/", "en-CA": "/ɑɹ/"}, "es": {"en-GB": "A:", "en-US": "A r", "en-AU": "A:", "en-IE": "A:", "en-IN": "A r", "en-CA": "A r"}, "words": ["car", "star", "farm", "park", "hard"]},
-            {"sound": "are", "ipa": {"en-GB": "/ɛə/", "en-US": "/ɛɹ/", "en-AU": "/ɛə/", "en-IE": "/ɛə/", "en-IN": "/ɛɹ/", "en-CA": "/ɛɹ/"}, "es": {"en-GB": "e@", "en-US": "e r", "en-AU": "e@", "en-IE": "e@", "en-IN": "e r", "en-CA": "e r"}, "words": ["care", "share", "bare", "dare", "scare"]},
-            {"sound": "ear", "ipa": {"en-GB": "/ɪə/", "en-US": "/ɪɹ/", "en-AU": "/ɪə/", "en-IE": "/ɪə/", "en-IN": "/ɪɹ/", "en-CA": "/ɪɹ/"}, "es": {"en-GB": "i@", "en-US": "i r", "en-AU": "i@", "en-IE": "i@", "en-IN": "i r", "en-CA": "i r"}, "words": ["hear", "near", "dear", "fear", "clear"]},
-            {"sound": "er", "ipa": {"en-GB": "/ə/", "en-US": "/ɹ/", "en-AU": "/ə/", "en-IE": "/ə/", "en-IN": "/ɹ/", "en-CA": "/ɹ/"}, "es": {"en-GB": "@", "en-US": "r", "en-AU": "@", "en-IE": "@", "en-IN": "r", "en-CA": "r"}, "words": ["letter", "better", "summer", "water", "matter"]},
-            {"sound": "ir", "ipa": {"en-GB": "/ɜː/", "en-US": "/ɜɹ/", "en-AU": "/ɜː/", "en-IE": "/ɜː/", "en-IN": "/ɜɹ/", "en-CA": "/ɜɹ/"}, "es": {"en-GB": "3:", "en-US": "3 r", "en-AU": "3:", "en-IE": "3:", "en-IN": "3 r", "en-CA": "3 r"}, "words": ["bird", "girl", "shirt", "dirt", "third"]},
-            {"sound": "ire", "ipa": {"en-GB": "/aɪə/", "en-US": "/aɪɹ/", "en-AU": "/aɪə/", "en-IE": "/aɪə/", "en-IN": "/aɪɹ/", "en-CA": "/aɪɹ/"}, "es": {"en-GB": "aI@", "en-US": "aI r", "en-AU": "aI@", "en-IE": "aI@", "en-IN": "aI r", "en-CA": "aI r"}, "words": ["fire", "wire", "tire", "hire", "sire"]},
-            {"sound": "or", "ipa": {"en-GB": "/ɔː/", "en-US": "/ɔɹ/", "en-AU": "/ɔː/", "en-IE": "/ɔː/", "en-IN": "/ɔɹ/", "en-CA": "/ɔɹ/"}, "es": {"en-GB": "O:", "en-US": "O r", "en-AU": "O:", "en-IE": "O:", "en-IN": "O r", "en-CA": "O r"}, "words": ["fork", "corn", "short", "born", "storm"]},
-            {"sound": "ur", "ipa": {"en-GB": "/ɜː/", "en-US": "/ɜɹ/", "en-AU": "/ɜː/", "en-IE": "/ɜː/", "en-IN": "/ɜɹ/", "en-CA": "/ɜɹ/"}, "es": {"en-GB": "3:", "en-US": "3 r", "en-AU": "3:", "en-IE": "3:", "en-IN": "3 r", "en-CA": "3 r"}, "words": ["nurse", "turn", "hurt", "burn", "curb"]},
-            {"sound": "ure", "ipa": {"en-GB": "/ɔə/", "en-US": "/ɔɹ/", "en-AU": "/ɔə/", "en-IE": "/ɔə/", "en-IN": "/ɔɹ/", "en-CA": "/ɔɹ/"}, "es": {"en-GB": "O@", "en-US": "O r", "en-AU": "O@", "en-IE": "O@", "en-IN": "O r", "en-CA": "O r"}, "words": ["pure", "cure", "sure", "lure", "endure"]}
-        ],
-        "Silent E Patterns": [
-            {"sound": "a_e", "ipa": "/eɪ/", "es": {"en-GB": "eI", "en-US": "eI", "en-AU": "eI", "en-IE": "eI", "en-IN": "eI", "en-CA": "eI"}, "words": ["cake", "name", "gate", "lake", "make"]},
-            {"sound": "i_e", "ipa": "/aɪ/", "es": {"en-GB": "aI", "en-US": "aI", "en-AU": "aI", "en-IE": "aI", "en-IN": "aI", "en-CA": "aI"}, "words": ["smile", "time", "bike", "like", "five"]},
-            {"sound": "o_e", "ipa": "/oʊ/", "es": {"en-GB": "oU", "en-US": "oU", "en-AU": "oU", "en-IE": "oU", "en-IN": "oU", "en-CA": "oU"}, "words": ["home", "bone", "rose", "hope", "note"]},
-            {"sound": "u_e", "ipa": "/uː/", "es": {"en-GB": "u:", "en-US": "u:", "en-AU": "u:", "en-IE": "u:", "en-IN": "u:", "en-CA": "u:"}, "words": ["huge", "cube", "tune", "mule", "fuse"]}
-        ]
-    },
-    "Advanced": {
-        "Soft C & G": [
-            {"sound": "c", "ipa": "/s/", "es": {"en-GB": "s", "en-US": "s", "en-AU": "s", "en-IE": "s", "en-IN": "s", "en-CA": "s"}, "words": ["city", "cent", "circle", "cease", "cycle"]},
-            {"sound": "g", "ipa": "/dʒ/", "es": {"en-GB": "dZ", "en-US": "dZ", "en-AU": "dZ", "en-IE": "dZ", "en-IN": "dZ", "en-CA": "dZ"}, "words": ["gym", "gem", "giant", "giraffe", "gist"]}
-        ],
-        "Y as Vowel": [
-            {"sound": "y", "ipa": "/aɪ/", "es": {"en-GB": "aI", "en-US": "aI", "en-AU": "aI", "en-IE": "aI", "en-IN": "aI", "en-CA": "aI"}, "words": ["my", "cry", "sky", "fly", "dry"]},
-            {"sound": "y", "ipa": "/ɪ/", "es": {"en-GB": "I", "en-US": "I", "en-AU": "I", "en-IE": "I", "en-IN": "I", "en-CA": "I"}, "words": ["happy", "baby", "lady", "candy", "funny"]}
-        ],
-        "Silent Letters": [
-            {"sound": "gn", "ipa": "/n/", "es": {"en-GB": "n", "en-US": "n", "en-AU": "n", "en-IE": "n", "en-IN": "n", "en-CA": "n"}, "words": ["gnat", "gnome", "sign", "design", "align"]},
-            {"sound": "kn", "ipa": "/n/", "es": {"en-GB": "n", "en-US": "n", "en-AU": "n", "en-IE": "n", "en-IN": "n", "en-CA": "n"}, "words": ["knee", "know", "knife", "knock", "knight"]},
-            {"sound": "ph", "ipa": "/f/", "es": {"en-GB": "f", "en-US": "f", "en-AU": "f", "en-IE": "f", "en-IN": "f", "en-CA": "f"}, "words": ["phone", "photo", "graph", "elephant", "phrase"]},
-            {"sound": "wr", "ipa": "/r/", "es": {"en-GB": "r", "en-US": "r", "en-AU": "r", "en-IE": "r", "en-IN": "r", "en-CA": "r"}, "words": ["write", "wrong", "wrap", "wrist", "wreck"]}
-        ],
-        "Quadgraphs": [
-            {"sound": "augh", "ipa": "/ɔ/", "es": {"en-GB": "O", "en-US": "O", "en-AU": "O", "en-IE": "O", "en-IN": "O", "en-CA": "O"}, "words": ["caught", "taught", "daughter", "naughty", "fraught"]},
-            {"sound": "eigh", "ipa": "/eɪ/", "es": {"en-GB": "eI", "en-US": "eI", "en-AU": "eI", "en-IE": "eI", "en-IN": "eI", "en-CA": "eI"}, "words": ["eight", "weight", "neighbor", "sleigh", "weigh"]},
-            {"sound": "ough", "ipa": "/ʌ/", "es": {"en-GB": "U", "en-US": "U", "en-AU": "U", "en-IE": "U", "en-IN": "U", "en-CA": "U"}, "words": ["tough", "rough", "enough", "trough", "slough"]},
-            {"sound": "ough", "ipa": "/uː/", "es": {"en-GB": "u:", "en-US": "u:", "en-AU": "u:", "en-IE": "u:", "en-IN": "u:", "en-CA": "u:"}, "words": ["through", "who", "threw", "flew", "grew"]},
-            {"sound": "ough", "ipa": "/oʊ/", "es": {"en-GB": "oU", "en-US": "oU", "en-AU": "oU", "en-IE": "oU", "en-IN": "oU", "en-CA": "oU"}, "words": ["though", "dough", "although", "thorough", "borough"]},
-            {"sound": "ough", "ipa": "/aʊ/", "es": {"en-GB": "aU", "en-US": "aU", "en-AU": "aU", "en-IE": "aU", "en-IN": "aU", "en-CA": "aU"}, "words": ["bough", "plough", "drought", "slough", "brought"]}
-        ],
-        "W/Qu-modified Vowels": [
-            {"sound": "war", "ipa": {"en-GB": "/ɔː/", "en-US": "/ɔɹ/", "en-AU": "/ɔː/", "en-IE": "/ɔː/", "en-IN": "/ɔɹ/", "en-CA": "/ɔɹ/"}, "es": {"en-GB": "O:", "en-US": "O r", "en-AU": "O:", "en-IE": "O:", "en-IN": "O r", "en-CA": "O r"}, "words": ["war", "warm", "warn", "ward", "wart"]},
-            {"sound": "quar", "ipa": {"en-GB": "/ɔː/", "en-US": "/ɔɹ/", "en-AU": "/ɔː/", "en-IE": "/ɔː/", "en-IN": "/ɔɹ/", "en-CA": "/ɔɹ/"}, "es": {"en-GB": "O:", "en-US": "O r", "en-AU": "O:", "en-IE": "O:", "en-IN": "O r", "en-CA": "O r"}, "words": ["quarter", "quartz", "quart", "quarry", "squash"]},
-            {"sound": "wor", "ipa": {"en-GB": "/ɜː/", "en-US": "/ɜɹ/", "en-AU": "/ɜː/", "en-IE": "/ɜː/", "en-IN": "/ɜɹ/", "en-CA": "/ɜɹ/"}, "es": {"en-GB": "3:", "en-US": "3 r", "en-AU": "3:", "en-IE": "3:", "en-IN": "3 r", "en-CA": "3 r"}, "words": ["word", "work", "worm", "worth", "world"]},
-            {"sound": "wa", "ipa": {"en-GB": "/ɒ/", "en-US": "/ɑ/", "en-AU": "/ɒ/", "en-IE": "/ɒ/", "en-IN": "/ɑ/", "en-CA": "/ɑ/"}, "es": {"en-GB": "O", "en-US": "A", "en-AU": "O", "en-IE": "O", "en-IN": "A", "en-CA": "A"}, "words": ["want", "wash", "watch", "water", "was"]}
-        ]
-    }
-}
+# Backend for all models (MODEL_BACKEND) or per model (e.g. MODEL_BACKEND_WAV2VEC2_LV60=onnx)
+MODEL_BACKEND = os.environ.get("MODEL_BACKEND", "torch")
+ONNX_DIR = os.environ.get("ONNX_DIR", DEFAULT_ONNX_DIR)
+
+def model_backend(model_id):
+    if "base" in MODELS[model_id]:
+        return DEGRADE_BACKEND
+    return os.environ.get(f"MODEL_BACKEND_{model_id.upper()}", MODEL_BACKEND)
+
+# Intra-op threads per model (MODEL_THREADS, or per model e.g. MODEL_THREADS_WAV2VEC2_LV60=2);
+# 0 keeps the process setting. Models run side by side in ensemble mode, so
+# capping each at its share of the cores keeps them from oversubscribing
+MODEL_THREADS = int(os.environ.get("MODEL_THREADS", "0"))
+
+def model_threads(model_id):
+    weights = MODELS[model_id].get("base", model_id)
+    return int(os.environ.get(f"MODEL_THREADS_{weights.upper()}", MODEL_THREADS))
+
+def limit_threads(model_id):
+    """Run in a model's batcher thread: torch keeps the intra-op thread count per thread"""
+    threads = model_threads(model_id)
+    if threads:
+        torch.set_num_threads(threads)
+
+def load_model(model_id):
+    """Load a model's processor and backend, falling back to fp32 torch"""
+    backend = model_backend(model_id)
+    weights = MODELS[model_id].get("base", model_id)
+    try:
+        processor, model = load_backend(weights, backend, ONNX_DIR, model_threads(model_id))
+        return processor, model, backend
+    except Exception as e:
+        # An fp32 twin would be a second full copy of its base model, not a
+        # degraded one; the twin stays unloaded and the base keeps serving
+        if backend == "torch" or "base" in MODELS[model_id]:
+            raise
+        print(f"✗ {MODELS[model_id]['name']} {backend} load failed, using torch: {e}")
+        processor, model = load_backend(weights, "torch", ONNX_DIR, model_threads(model_id))
+        return processor, model, "torch"
+
+# Models load on first use (or PRELOAD_MODELS at startup); once the loaded ones
+# exceed MODEL_MEMORY_BUDGET_MB the least recently used are unloaded
+MODEL_MEMORY_BUDGET_MB = int(os.environ.get("MODEL_MEMORY_BUDGET_MB", "0"))
+PRELOAD_MODELS = [m for m in os.environ.get("PRELOAD_MODELS", "").split(",") if m in MODELS]
+
+REGISTRY = ModelRegistry(MODELS, load_model, budget_bytes=MODEL_MEMORY_BUDGET_MB * 1024 * 1024)
+REGISTRY.preload(PRELOAD_MODELS)
+
+# Micro-batching: clips arriving within BATCH_WINDOW_MS share one forward pass
+BATCH_WINDOW_MS = float(os.environ.get("BATCH_WINDOW_MS", "20"))
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "8"))
+
+def forward_batch(model_id, speeches):
+    """Run one padded forward pass and return the CTC logits of each clip"""
+    model = REGISTRY.get(model_id)
+    processor = MODELS[model_id]["processor"]
+
+    inputs = processor(speeches, sampling_rate=16000, return_tensors="pt",
+                       padding=True, return_attention_mask=True)
+    logits = model(inputs.input_values, inputs.attention_mask)
+
+    # Drop the frames that only cover padding
+    lengths = output_lengths(model.config, inputs.attention_mask.sum(-1))
+    return [logits[i, :int(lengths[i])] for i in range(len(speeches))]
+
+def start_batchers():
+    """Give every model a fresh MicroBatcher (and worker thread)"""
+    for model_id, model_data in MODELS.items():
+        model_data["batcher"] = MicroBatcher(
+            model_id, partial(forward_batch, model_id),
+            max_batch=BATCH_MAX_SIZE, max_wait_ms=BATCH_WINDOW_MS,
+            thread_init=partial(limit_threads, model_id)
+        )
+
+start_batchers()
+
+# Admission control for inference (see admission.py): a bounded, per-client
+# fair queue that answers 503/429 with Retry-After when it is full
+ADMISSION = AdmissionController(
+    max_active=int(os.environ.get("ADMISSION_MAX_ACTIVE", str(BATCH_MAX_SIZE))),
+    max_queue=int(os.environ.get("ADMISSION_MAX_QUEUE", "16")),
+    max_per_client=int(os.environ.get("ADMISSION_MAX_PER_CLIENT", "4")),
+    max_wait_s=float(os.environ.get("ADMISSION_MAX_WAIT_MS", "5000")) / 1000
+)
+CLIENT_ID_HEADER = os.environ.get("CLIENT_ID_HEADER", "X-Client-Id")
+
+def client_id():
+    """Fairness key of the current request: CLIENT_ID_HEADER, else the remote address"""
+    return request.headers.get(CLIENT_ID_HEADER) or request.remote_addr or "unknown"
+
+def busy_response(rejected):
+    """503 (server saturated) or 429 (client over its share) with Retry-After"""
+    response = jsonify({
+        "error": "Server busy, retry later",
+        "reason": rejected.reason,
+        "retry_after": rejected.retry_after
+    })
+    response.status_code = 429 if rejected.reason == "client_limit" else 503
+    response.headers["Retry-After"] = str(rejected.retry_after)
+    return response
+
+# Model outputs of recent clips (see analysis_cache.py): a re-submitted
+# recording is rescored without another forward pass
+ANALYSIS_CACHE = AnalysisCache(
+    max_entries=int(os.environ.get("ANALYSIS_CACHE_ENTRIES", "256")),
+    max_bytes=int(os.environ.get("ANALYSIS_CACHE_MB", "128")) * 1024 * 1024
+)
+
+def cached_output(fingerprint, model_id):
+    """(logits, transcription) of an already analyzed clip, or None"""
+    cached = ANALYSIS_CACHE.get(fingerprint, model_id)
+    if fingerprint is not None:
+        ANALYSIS_CACHE_LOOKUPS.labels("miss" if cached is None else "hit").inc()
+    return cached
+
+def serving_model(model_id):
+    """The requested model, or its loaded quantized twin while the queue is under pressure"""
+    twin = MODELS[model_id].get("degraded")
+    if twin and ADMISSION.pressure() >= DEGRADE_AT and REGISTRY.is_loaded(twin):
+        ADMISSION.note("degraded")
+        return twin
+    return model_id
+
+# model=ensemble runs every ENSEMBLE_MODELS model on the same decoded clip.
+# Each model's batcher has its own worker thread, so the forward passes run
+# concurrently and the request takes about as long as the slowest model
+ENSEMBLE_ID = "ensemble"
+ENSEMBLE_MODELS = [m for m in os.environ.get("ENSEMBLE_MODELS", "wav2vec2_lv60,wav2vec2_xlsr53").split(",")
+                   if m in MODELS]
 
 # Map frontend accent codes to backend accent names
 ACCENT_MAP = {
@@ -212,80 +208,398 @@ def get_value_for_accent(data, accent_code):
         return data.get(accent_code) or data.get("en-US") or list(data.values())[0]
     return data
 
-def espeak_to_ipa(espeak_seq):
-    """Convert eSpeak phonemes to IPA"""
-    if not espeak_seq or espeak_seq == "N/A":
-        return "N/A"
+def catalog_accent(accent_code):
+    """Accent code a catalog response is compiled for (unknown codes read as en-US)"""
+    return accent_code if accent_code in ACCENT_MAP else "en-US"
+
+# Word catalog: src/catalog.json (or CATALOG_PATH), reloaded when the file changes
+CATALOG_PATH = os.environ.get(
+    "CATALOG_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.json")
+)
+CATALOG_RELOAD_SECONDS = float(os.environ.get("CATALOG_RELOAD_SECONDS", "2"))
+CATALOG_FORMAT = 1
+
+# A per-accent value is either shared by all accents or {accent_code: value}
+ACCENT_VALUE = (str, {str: str})
+CATALOG_SCHEMA = {
+    "format": int,
+    # levels[level][category][sound_index] = {sound, ipa, es, words}
+    "levels": {str: {str: [{"sound": str, "ipa": ACCENT_VALUE, "es": ACCENT_VALUE, "words": [str]}]}},
+}
+
+def compile_catalog(phonics_data):
+    """Serialize every navigation response once (see catalog.py)"""
+    catalog = CompiledCatalog(partial(app.json.dumps, separators=(",", ":")))
+    catalog.add(("levels",), list(phonics_data.keys()))
+    for level, categories in phonics_data.items():
+        catalog.add(("categories", level), list(categories.keys()))
+        for category, sounds in categories.items():
+            for accent_code in ACCENT_MAP:
+                catalog.add(("sounds", level, category, accent_code), [
+                    {
+                        "id": idx,
+                        "sound": sound_data["sound"],
+                        "ipa": get_value_for_accent(sound_data["ipa"], accent_code),
+                        "es": get_value_for_accent(sound_data["es"], accent_code)
+                    }
+                    for idx, sound_data in enumerate(sounds)
+                ])
+                for idx, sound_data in enumerate(sounds):
+                    es_value = get_value_for_accent(sound_data["es"], accent_code)
+                    catalog.add(("sound_words", level, category, idx, accent_code), {
+                        "sound": sound_data["sound"],
+                        "ipa": get_value_for_accent(sound_data["ipa"], accent_code),
+                        "es": es_value,
+                        # Include the sound itself as the first word for practice
+                        "words": [sound_data["sound"]] + sound_data["words"],
+                        "reference_es": es_value  # eSpeak letters for reference sound
+                    })
+    return catalog
+
+def build_catalog(raw):
+    """Validate a decoded catalog.json and compile its responses"""
+    validate(raw, CATALOG_SCHEMA)
+    if raw["format"] != CATALOG_FORMAT:
+        raise CatalogError(f"format {raw['format']}, expected {CATALOG_FORMAT}")
+    for level, categories in raw["levels"].items():
+        for category, sounds in categories.items():
+            for idx, sound_data in enumerate(sounds):
+                for field in ("ipa", "es"):
+                    value = sound_data[field]
+                    if isinstance(value, dict) and (not value or set(value) - set(ACCENT_MAP)):
+                        raise CatalogError(f"{level}/{category}[{idx}].{field}: "
+                                           f"expected accent codes from {', '.join(ACCENT_MAP)}")
+    return CatalogSnapshot(raw["levels"], compile_catalog(raw["levels"]))
+
+CATALOG = CatalogStore(CATALOG_PATH, build_catalog, check_interval=CATALOG_RELOAD_SECONDS)
+print(f"✓ Catalog loaded from {CATALOG_PATH} (version {CATALOG.version}, "
+      f"{len(CATALOG.current.responses)} responses)")
+
+def catalog_lookup(view, args, sound_id=None):
+    """Precompiled (body, etag) for a navigation request: (compiled, None) or (None, (error, status))"""
+    catalog = CATALOG.get()
+    level = args.get('level', 'Basic')
+    category = args.get('category', '')
+    accent_code = catalog_accent(args.get('accent', 'en-US'))
+    
+    if view == "levels":
+        key, error = ("levels",), None
+    elif view == "categories":
+        key, error = ("categories", level), ("Invalid level", 400)
+    elif view == "sounds":
+        key, error = ("sounds", level, category, accent_code), ("Invalid level or category", 400)
+    else:
+        key = ("sound_words", level, category, sound_id, accent_code)
+        if level not in catalog.data or category not in catalog.data[level]:
+            error = ("Invalid level or category", 400)
+        else:
+            error = ("Sound not found", 404)
+    
+    compiled = catalog.responses.get(key)
+    return (compiled, None) if compiled else (None, error)
+
+def catalog_response(view, **item):
+    """Serve a precompiled body, or an empty 304 if the client already has it"""
+    compiled, error = catalog_lookup(view, request.args, **item)
+    if error:
+        return jsonify({"error": error[0]}), error[1]
     
-    tokens = espeak_seq.split()
-    ipa_tokens = [ESPEAK_TO_IPA.get(t, t) for t in tokens]
-    return "".join(ipa_tokens)
+    body, etag = compiled
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    else:
+        response = app.response_class(body, mimetype="application/json")
+    response.set_etag(etag)
+    # Let clients keep the body but revalidate it, which costs one lookup
+    response.cache_control.no_cache = True
+    return response
+
+# Phoneme-level scorer: feature-weighted edit distance over IPA tokens (see alignment.py)
+ALIGNER = PhonemeAligner(TOKENIZER)
 
 def calculate_score(detected, expected):
-    """Calculate similarity score 0-100 using SequenceMatcher"""
+    """Calculate similarity score 0-100 from a phoneme alignment"""
     if expected == "N/A":
         return 0
     
-    matcher = SequenceMatcher(None, detected.lower(), expected.lower())
-    ratio = matcher.ratio()
-    return int(ratio * 100)
-
-def get_espeak_phonemes_for_word(word, accent_code):
-    """Get eSpeak phonemes for a word using espeak-ng"""
-    accent_map = {
-        "en-GB": "en-gb",
-        "en-US": "en-us",
-        "en-AU": "en-au",
-        "en-IE": "en-ie",
-        "en-IN": "en-in",
-        "en-CA": "en-ca"
-    }
-    voice = accent_map.get(accent_code, "en-us")
+    return ALIGNER.score(detected, expected)
+
+# Silence trimming and length cap applied before inference (see vad.py)
+VAD_TRIM = os.environ.get("VAD_TRIM", "1") == "1"
+VAD_TOP_DB = float(os.environ.get("VAD_TOP_DB", "35"))
+VAD_PAD_MS = int(os.environ.get("VAD_PAD_MS", "150"))
+MAX_AUDIO_SECONDS = float(os.environ.get("MAX_AUDIO_SECONDS", "15"))
+
+def prepare_clip(speech):
+    """Trim silence and cap the clip at MAX_AUDIO_SECONDS; returns (speech, report)"""
+    return prepare_speech(speech, trim=VAD_TRIM, max_seconds=MAX_AUDIO_SECONDS,
+                          top_db=VAD_TOP_DB, pad_ms=VAD_PAD_MS)
+
+def fix_wav_header(wav):
+    """Fill in the RIFF/data sizes espeak-ng cannot seek back to when writing to a pipe"""
+    data_at = wav.find(b'data', 12)
+    if not wav.startswith(b'RIFF') or data_at < 0:
+        return wav
+    wav = bytearray(wav)
+    struct.pack_into('<I', wav, 4, len(wav) - 8)
+    struct.pack_into('<I', wav, data_at + 4, len(wav) - data_at - 8)
+    return bytes(wav)
+
+# espeak-ng speed (words per minute) and gap between words (ms)
+TTS_SPEED = 150
+TTS_GAP = 5
+
+# Resident libespeak-ng workers, one per voice (ESPEAK_POOL=0 forces the subprocess path)
+ESPEAK_POOL_ENABLED = os.environ.get("ESPEAK_POOL", "1") == "1"
+ESPEAK_POOL = EspeakPool(voices=ESPEAK_VOICES.values(), enabled=ESPEAK_POOL_ENABLED)
+if ESPEAK_POOL.available:
+    print(f"✓ espeak-ng worker pool using {ESPEAK_POOL.library}")
+else:
+    print("✗ libespeak-ng not found, TTS will spawn espeak-ng per request")
+
+def espeak_engine():
+    """How espeak-ng is run ("pool" or "subprocess"), for the metrics and TTS cache keys"""
+    return "pool" if ESPEAK_POOL.available else "subprocess"
+
+def synthesize_wav(text, voice, timeout=10):
+    """(engine, WAV bytes) from the resident espeak-ng pool, or a subprocess as fallback"""
+    if ESPEAK_POOL.available:
+        try:
+            with espeak_call("tts", "pool"):
+                return "pool", ESPEAK_POOL.synthesize(text, voice, TTS_SPEED, TTS_GAP, timeout=timeout)
+        except Exception as e:
+            print(f"✗ espeak-ng pool failed, falling back to subprocess: {e}")
     
-    try:
-        # Use espeak-ng with phoneme output (-x flag)
-        result = subprocess.run(
-            ['espeak-ng', '-x', '-v', voice, word],
-            capture_output=True,
-            text=True,
-            check=True,
-            timeout=5
-        )
-        # Extract phonemes (remove brackets and clean)
-        phonemes = result.stdout.strip()
-        # Remove brackets if present
-        phonemes = re.sub(r'[\[\]]', '', phonemes)
-        return phonemes
-    except subprocess.TimeoutExpired:
-        return None
-    except Exception as e:
-        return None
+    with espeak_call("tts", "subprocess"):
+        result = subprocess.run([
+            'espeak-ng',
+            '-s', str(TTS_SPEED),
+            '-g', str(TTS_GAP),
+            '-v', voice,
+            '--stdout',
+            text
+        ], check=True, capture_output=True, timeout=timeout)
+    return "subprocess", fix_wav_header(result.stdout)
+
+# Synthesized audio cache: bounded memory LRU plus optional shared disk tier
+TTS_CACHE = TTSCache(
+    max_entries=int(os.environ.get("TTS_CACHE_ENTRIES", "1024")),
+    max_bytes=int(os.environ.get("TTS_CACHE_MB", "64")) * 1024 * 1024,
+    disk_dir=os.environ.get("TTS_CACHE_DIR")
+)
+TTS_CACHE_MAX_AGE = int(os.environ.get("TTS_CACHE_MAX_AGE", "86400"))
+
+def tts_args():
+    """TTS parameters from the query string (GET) or JSON body (POST)"""
+    if request.method == 'GET':
+        return request.args
+    return request.get_json(silent=True) or {}
+
+def tts_key(text, voice):
+    """TTS cache key and ETag for text spoken by the configured engine"""
+    return TTSCache.make_key(text, voice, TTS_SPEED, TTS_GAP, espeak_engine())
+
+def get_tts_wav(text, voice):
+    """Return (cache key, WAV bytes), synthesizing on a cache miss"""
+    key = tts_key(text, voice)
+    wav = TTS_CACHE.get(key)
+    TTS_REQUESTS.labels("miss" if wav is None else "hit").inc()
+    if wav is None:
+        engine, wav = synthesize_wav(text, voice)
+        # Audio from a subprocess fallback does not belong under the pool's key
+        if wav and engine == espeak_engine():
+            TTS_CACHE.put(key, wav)
+    return key, wav
+
+def tts_response(text, voice):
+    """Serve synthesized WAV through the TTS cache, with ETag/Cache-Control"""
+    key = tts_key(text, voice)
+    if request.if_none_match.contains(key):
+        TTS_REQUESTS.labels("not_modified").inc()
+        response = app.response_class(status=304)
+        response.set_etag(key)
+        return response
+    
+    key, wav = get_tts_wav(text, voice)
+    if not wav:
+        return jsonify({"error": "Audio generation failed"}), 500
+    
+    return send_file(io.BytesIO(wav), mimetype='audio/wav', etag=key, max_age=TTS_CACHE_MAX_AGE)
 
 # Build WORDS dictionary lazily - phonemes will be fetched on-demand
 WORDS = {}
 
+# Compiled lexicon shared read-only by all workers (see lexicon.py);
+# espeak-ng is only run for words it does not cover
+LEXICON = Lexicon.open(os.environ.get("LEXICON_PATH", DEFAULT_LEXICON_PATH))
+
+def get_known_phonemes(word, accent_name):
+    """Phonemes from the process cache or the compiled lexicon, without running espeak-ng"""
+    # Check cache first
+    if word in WORDS and accent_name in WORDS[word]:
+        return WORDS[word][accent_name]
+    
+    # Then the compiled lexicon
+    if LEXICON:
+        entry = LEXICON.lookup(word, accent_name)
+        if entry:
+            WORDS.setdefault(word, {})[accent_name] = entry
+            return entry
+    return None
+
+def remember_phonemes(word, accent_name, espeak_phonemes):
+    """Cache espeak-ng output for a word and return its {espeak, ipa} entry"""
+    # setdefault, so threads filling other accents of the same word keep theirs
+    entry = {
+        "espeak": espeak_phonemes,
+        "ipa": espeak_to_ipa(espeak_phonemes)
+    }
+    WORDS.setdefault(word, {})[accent_name] = entry
+    return entry
+
 def get_word_phonemes_lazy(word, accent_code):
     """Get phonemes for a word on-demand (lazy loading)"""
     accent_name = ACCENT_MAP.get(accent_code, "American")
     
-    # Check cache first
-    if word in WORDS and accent_name in WORDS[word]:
-        return WORDS[word][accent_name]
+    entry = get_known_phonemes(word, accent_name)
+    if entry:
+        return entry
     
     # Get phonemes from espeak-ng
-    espeak_phonemes = get_espeak_phonemes_for_word(word, accent_code)
+    with espeak_call("phonemes", espeak_engine()) as outcome:
+        espeak_phonemes = get_espeak_phonemes_for_word(word, accent_code, ESPEAK_POOL)
+        outcome["ok"] = bool(espeak_phonemes)
     if espeak_phonemes:
-        ipa_value = espeak_to_ipa(espeak_phonemes)
-        if word not in WORDS:
-            WORDS[word] = {}
-        WORDS[word][accent_name] = {
-            "espeak": espeak_phonemes,
-            "ipa": ipa_value
-        }
-        return WORDS[word][accent_name]
+        return remember_phonemes(word, accent_name, espeak_phonemes)
     return None
 
-print("✓ Server ready (words will be loaded on-demand)")
+def get_words_phonemes(words, accent_codes):
+    """Bulk get_word_phonemes_lazy: {word: {accent_code: entry or None}}
+    
+    Misses for each accent are resolved together in a single espeak-ng call.
+    """
+    results = {word: {} for word in words}
+    for accent_code in accent_codes:
+        accent_name = ACCENT_MAP.get(accent_code, "American")
+        missing = []
+        for word in results:
+            entry = get_known_phonemes(word, accent_name)
+            results[word][accent_code] = entry
+            if not entry:
+                missing.append(word)
+        
+        if missing:
+            with espeak_call("phonemes", espeak_engine()) as outcome:
+                resolved = get_espeak_phonemes_for_words(missing, accent_code, ESPEAK_POOL)
+                outcome["ok"] = all(resolved.get(word) for word in missing)
+            for word in missing:
+                if resolved.get(word):
+                    results[word][accent_code] = remember_phonemes(word, accent_name, resolved[word])
+    return results
+
+# Optional warm-up: resolve phonemes and pre-render reference audio for the
+# whole catalog in the background so no learner pays for a cold espeak-ng call
+WARMUP = os.environ.get("WARMUP", "0") == "1"
+WARMUP_THREADS = int(os.environ.get("WARMUP_THREADS", "4"))
+WARMUP_TTS = os.environ.get("WARMUP_TTS", "1") == "1"
+
+WARMUP_STATE = {"total": 0, "done": 0, "failed": 0, "started": None, "finished": None}
+WARMUP_LOCK = threading.Lock()
+
+def warmup_jobs():
+    """Every (kind, text, accent code) the catalog can ask espeak-ng for"""
+    jobs = set()
+    for categories in CATALOG.get().data.values():
+        for sounds in categories.values():
+            for sound_data in sounds:
+                for accent_code in ACCENT_MAP:
+                    jobs.add(("espeak", get_value_for_accent(sound_data["es"], accent_code), accent_code))
+                    for word in sound_data["words"]:
+                        jobs.add(("word", word, accent_code))
+    return sorted(jobs)
+
+def warmup_one(job):
+    """Resolve one catalog entry; returns False if espeak-ng failed"""
+    kind, text, accent_code = job
+    voice = ESPEAK_VOICES.get(accent_code, "en-us")
+    if kind == "word":
+        if not get_word_phonemes_lazy(text, accent_code):
+            return False
+        if WARMUP_TTS:
+            return bool(get_tts_wav(text, voice)[1])
+        return True
+    if WARMUP_TTS:
+        return bool(get_tts_wav(f"[[{text}]]", voice)[1])
+    return True
+
+def run_warmup():
+    jobs = warmup_jobs()
+    with WARMUP_LOCK:
+        WARMUP_STATE.update(total=len(jobs), started=time.time())
+    if WARMUP_TTS and TTS_CACHE.max_entries < len(jobs):
+        print(f"✗ TTS cache holds {TTS_CACHE.max_entries} clips but warm-up renders {len(jobs)}; "
+              f"raise TTS_CACHE_ENTRIES or set TTS_CACHE_DIR")
+    
+    with ThreadPoolExecutor(max_workers=WARMUP_THREADS, thread_name_prefix="warmup") as pool:
+        futures = [pool.submit(warmup_one, job) for job in jobs]
+        for future in as_completed(futures):
+            try:
+                ok = future.result()
+            except Exception:
+                ok = False
+            with WARMUP_LOCK:
+                WARMUP_STATE["done"] += 1
+                if not ok:
+                    WARMUP_STATE["failed"] += 1
+    
+    with WARMUP_LOCK:
+        WARMUP_STATE["finished"] = time.time()
+        elapsed = WARMUP_STATE["finished"] - WARMUP_STATE["started"]
+        print(f"✓ Warm-up finished: {WARMUP_STATE['done']} entries "
+              f"({WARMUP_STATE['failed']} failed) in {elapsed:.1f}s")
+
+def warmup_progress():
+    """Snapshot of warm-up progress for the readiness probe"""
+    with WARMUP_LOCK:
+        state = dict(WARMUP_STATE)
+    state["enabled"] = WARMUP
+    state["ready"] = not WARMUP or state["finished"] is not None
+    state["progress"] = round(state["done"] / state["total"], 3) if state["total"] else (1.0 if state["ready"] else 0.0)
+    return state
+
+WARMUP_THREAD = None
+if WARMUP:
+    WARMUP_THREAD = threading.Thread(target=run_warmup, name="warmup", daemon=True)
+    WARMUP_THREAD.start()
+    print(f"✓ Server ready (warming up catalog with {WARMUP_THREADS} threads, see /ready)")
+else:
+    print("✓ Server ready (words will be loaded on-demand)")
+
+# Pre-fork serving (gunicorn -c src/gunicorn.conf.py): the master loads the
+# models and warms the catalog once, then workers fork and share those pages
+TORCH_THREADS = int(os.environ.get("TORCH_THREADS", "0"))
+
+def prepare_for_fork():
+    """Run in the master before workers fork: load shared state, then freeze it"""
+    # Degraded twins only load here when listed in PRELOAD_MODELS
+    REGISTRY.preload(PRELOAD_MODELS or [m for m in MODELS if "base" not in MODELS[m]])
+    if WARMUP_THREAD:
+        WARMUP_THREAD.join()
+    # Keep the collector from touching (and so copying) inherited objects
+    gc.collect()
+    gc.freeze()
+
+def after_fork(workers=1):
+    """Run in each forked worker: recreate the threads and pools fork does not copy"""
+    global ESPEAK_POOL
+    torch.set_num_threads(TORCH_THREADS or max(1, (os.cpu_count() or 1) // workers))
+    for model_id, model_data in MODELS.items():
+        if model_data["model"] is not None and not model_data["model"].fork_safe:
+            REGISTRY.unload(model_id)
+    start_batchers()
+    ESPEAK_POOL = EspeakPool(voices=ESPEAK_VOICES.values(), enabled=ESPEAK_POOL_ENABLED)
+    if LEXICON:
+        LEXICON.reopen()
 
 @app.route('/')
 def index():
@@ -293,161 +607,168 @@ def index():
 
 @app.route('/models')
 def get_models():
-    available = []
-    for model_id, model_data in MODELS.items():
-        if model_data["model"]:
-            available.append({"id": model_id, "name": model_data["name"]})
-    return jsonify(available)
+    """Configured models with their loaded/unloaded state and ENSEMBLE_MODELS membership"""
+    return jsonify([dict(model, ensemble=model["id"] in ENSEMBLE_MODELS) for model in REGISTRY.status()])
+
+@app.route('/models/<model_id>/load', methods=['POST'])
+def load_model_endpoint(model_id):
+    """Explicitly preload a model"""
+    if model_id not in MODELS:
+        return jsonify({"error": "Unknown model"}), 404
+    try:
+        REGISTRY.get(model_id)
+    except Exception as e:
+        return jsonify({"error": f"Model load failed: {e}"}), 503
+    return jsonify(REGISTRY.status())
+
+@app.route('/models/<model_id>/unload', methods=['POST'])
+def unload_model_endpoint(model_id):
+    """Free a model's memory; it reloads on the next request that needs it"""
+    if model_id not in MODELS:
+        return jsonify({"error": "Unknown model"}), 404
+    REGISTRY.unload(model_id)
+    return jsonify(REGISTRY.status())
+
+@app.route('/stats')
+def get_stats():
+    """Inference queue, admission, analysis cache, TTS cache, espeak-ng pool, lexicon and catalog statistics"""
+    return jsonify({
+        "models": REGISTRY.stats(),
+        "batching": {
+            model_id: model_data["batcher"].stats()
+            for model_id, model_data in MODELS.items()
+        },
+        "admission": ADMISSION.stats(),
+        "analysis_cache": ANALYSIS_CACHE.stats(),
+        "tts_cache": TTS_CACHE.stats(),
+        "espeak_pool": ESPEAK_POOL.stats(),
+        "lexicon": LEXICON.meta if LEXICON else None,
+        "catalog": CATALOG.stats()
+    })
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics (see metrics.py)"""
+    body, content_type = render_metrics()
+    return app.response_class(body, content_type=content_type)
+
+@app.route('/ready')
+def ready():
+    """Readiness probe: 503 until the optional catalog warm-up has finished"""
+    state = warmup_progress()
+    return jsonify(state), (200 if state["ready"] else 503)
 
 @app.route('/levels')
 def get_levels():
     """Get available levels"""
-    return jsonify(list(PHONICS_DATA.keys()))
+    return catalog_response("levels")
 
 @app.route('/categories')
 def get_categories():
     """Get categories for a level"""
-    level = request.args.get('level', 'Basic')
-    if level not in PHONICS_DATA:
-        return jsonify({"error": "Invalid level"}), 400
-    
-    return jsonify(list(PHONICS_DATA[level].keys()))
+    return catalog_response("categories")
 
 @app.route('/sounds')
 def get_sounds():
-    """Get sounds for a level and category"""
-    level = request.args.get('level', 'Basic')
-    category = request.args.get('category', '')
-    
-    if level not in PHONICS_DATA or category not in PHONICS_DATA[level]:
-        return jsonify({"error": "Invalid level or category"}), 400
-    
-    sounds = []
-    for idx, sound_data in enumerate(PHONICS_DATA[level][category]):
-        sounds.append({
-            "id": idx,
-            "sound": sound_data["sound"],
-            "ipa": get_value_for_accent(sound_data["ipa"], "en-US"),
-            "es": get_value_for_accent(sound_data["es"], "en-US")
-        })
-    
-    return jsonify(sounds)
+    """Get sounds for a level and category (IPA/eSpeak for `accent`, default en-US)"""
+    return catalog_response("sounds")
 
 @app.route('/sound/<int:sound_id>/words')
 def get_sound_words(sound_id):
     """Get words for a specific sound"""
-    level = request.args.get('level', 'Basic')
-    category = request.args.get('category', '')
-    accent_code = request.args.get('accent', 'en-US')
-    
-    if level not in PHONICS_DATA or category not in PHONICS_DATA[level]:
-        return jsonify({"error": "Invalid level or category"}), 400
-    
-    if sound_id >= len(PHONICS_DATA[level][category]):
-        return jsonify({"error": "Sound not found"}), 404
+    return catalog_response("sound_words", sound_id=sound_id)
+
+# Upper bound on words x accents resolved by one /phonemes call
+PHONEMES_MAX_BATCH = int(os.environ.get("PHONEMES_MAX_BATCH", "2000"))
+
+@app.route('/phonemes', methods=['GET', 'POST'])
+def get_phonemes():
+    """Expected eSpeak phonemes and IPA for many words and accents at once"""
+    if request.method == 'GET':
+        words = [w for w in request.args.get('words', '').split(',') if w]
+        accents = [a for a in request.args.get('accents', 'en-US').split(',') if a]
+    else:
+        data = request.get_json(silent=True) or {}
+        words = data.get('words', [])
+        accents = data.get('accents', ['en-US'])
     
-    sound_data = PHONICS_DATA[level][category][sound_id]
-    sound = sound_data["sound"]
-    es_value = get_value_for_accent(sound_data["es"], accent_code)
-    ipa_value = get_value_for_accent(sound_data["ipa"], accent_code)
+    if not isinstance(words, list) or not all(isinstance(w, str) and w for w in words):
+        return jsonify({"error": "words must be a list of non-empty strings"}), 400
+    if not isinstance(accents, list) or not accents or any(a not in ACCENT_MAP for a in accents):
+        return jsonify({"error": f"accents must be a list of {', '.join(ACCENT_MAP)}"}), 400
     
-    # Include the sound itself as the first word for practice
-    words = [sound] + sound_data["words"]
+    words = list(dict.fromkeys(words))
+    accents = list(dict.fromkeys(accents))
+    if len(words) * len(accents) > PHONEMES_MAX_BATCH:
+        return jsonify({"error": f"At most {PHONEMES_MAX_BATCH} word/accent pairs per request"}), 400
     
-    return jsonify({
-        "sound": sound,
-        "ipa": ipa_value,
-        "es": es_value,
-        "words": words,
-        "reference_es": es_value  # eSpeak letters for reference sound
-    })
+    return jsonify(get_words_phonemes(words, accents))
 
-@app.route('/tts', methods=['POST'])
+@app.route('/tts', methods=['GET', 'POST'])
 def text_to_speech():
     """Generate speech audio using espeak"""
-    data = request.get_json()
+    data = tts_args()
     text = data.get('text', '')
     accent_code = data.get('accent', 'en-US')
     
     if not text:
         return jsonify({"error": "No text provided"}), 400
     
-    # Map accent code to espeak voice
-    accent_map = {
-        "en-GB": "en-gb",
-        "en-US": "en-us",
-        "en-AU": "en-au",
-        "en-IE": "en-ie",
-        "en-IN": "en-in",
-        "en-CA": "en-ca"
-    }
-    voice = accent_map.get(accent_code, "en-us")
+    voice = ESPEAK_VOICES.get(accent_code, "en-us")
     
-    # Generate audio file
-    audio_path = '/tmp/tts_output.wav'
     try:
-        subprocess.run([
-            'espeak-ng',
-            '-s', '150',
-            '-g', '5',
-            '-v', voice,
-            '-w', audio_path,
-            text
-        ], check=True, capture_output=True, timeout=10)
-        
-        if not os.path.exists(audio_path):
-            return jsonify({"error": "Audio generation failed"}), 500
-        
-        return send_file(audio_path, mimetype='audio/wav')
+        return tts_response(text, voice)
     except subprocess.CalledProcessError as e:
         return jsonify({"error": f"espeak error: {e.stderr.decode()}"}), 500
     except Exception as e:
         return jsonify({"error": f"TTS failed: {e}"}), 500
 
-@app.route('/tts-espeak', methods=['POST'])
+@app.route('/tts-espeak', methods=['GET', 'POST'])
 def text_to_speech_espeak():
     """Generate speech audio using espeak phonemes directly"""
-    data = request.get_json()
+    data = tts_args()
     espeak_phonemes = data.get('espeak', '')
     accent_code = data.get('accent', 'en-US')
     
     if not espeak_phonemes:
         return jsonify({"error": "No espeak phonemes provided"}), 400
     
-    accent_map = {
-        "en-GB": "en-gb",
-        "en-US": "en-us",
-        "en-AU": "en-au",
-        "en-IE": "en-ie",
-        "en-IN": "en-in",
-        "en-CA": "en-ca"
-    }
-    voice = accent_map.get(accent_code, "en-us")
+    voice = ESPEAK_VOICES.get(accent_code, "en-us")
     
-    audio_path = '/tmp/tts_espeak_output.wav'
     try:
         # Use espeak with phoneme input ([[phonemes]])
         phoneme_text = f"[[{espeak_phonemes}]]"
-        subprocess.run([
-            'espeak-ng',
-            '-s', '150',
-            '-g', '5',
-            '-v', voice,
-            '-w', audio_path,
-            phoneme_text
-        ], check=True, capture_output=True, timeout=10)
-        
-        if not os.path.exists(audio_path):
-            return jsonify({"error": "Audio generation failed"}), 500
-        
-        return send_file(audio_path, mimetype='audio/wav')
+        return tts_response(phoneme_text, voice)
     except subprocess.CalledProcessError as e:
         return jsonify({"error": f"espeak error: {e.stderr.decode()}"}), 500
     except Exception as e:
         return jsonify({"error": f"TTS failed: {e}"}), 500
 
+# Per-stage /analyze timings are always recorded for /metrics; SERVER_TIMING=1
+# also returns them to the client in a Server-Timing header
+SERVER_TIMING = os.environ.get("SERVER_TIMING", "0") == "1"
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
+    """Score a recording; admission-controlled, so it may answer 503/429 under load"""
+    timer = StageTimer()
+    try:
+        with ADMISSION.admit(client_id()) as waited:
+            track_admission(ADMISSION)
+            timer.record("queue", waited)
+            response = app.make_response(run_analysis(waited, timer))
+    except Rejected as e:
+        ADMISSION_REJECTED.labels(e.reason).inc()
+        response = busy_response(e)
+    finally:
+        track_admission(ADMISSION)
+    
+    timer.observe(response.status_code)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = timer.server_timing()
+    return response
+
+def run_analysis(waited, timer):
     if 'audio' not in request.files:
         return jsonify({"error": "No audio file"}), 400
     
@@ -455,33 +776,150 @@ def analyze():
     accent_code = request.form.get('accent', 'en-US')
     word = request.form.get('word', '')
     model_id = request.form.get('model', 'wav2vec2_lv60')
+    mode = request.form.get('mode', 'alignment')
+    timer.labels.update(model=label(model_id, [*MODELS, ENSEMBLE_ID]), accent=label(accent_code, ACCENT_MAP),
+                        mode=label(mode, SCORING_MODES))
     
-    accent_name = ACCENT_MAP.get(accent_code, "American")
-    
-    if model_id not in MODELS or not MODELS[model_id]["model"]:
+    ensemble = model_id == ENSEMBLE_ID and len(ENSEMBLE_MODELS) > 1
+    if model_id not in MODELS and not ensemble:
         return jsonify({"error": "Model not available"}), 400
+    if mode not in SCORING_MODES:
+        return jsonify({"error": f"Unknown mode, expected one of {', '.join(SCORING_MODES)}"}), 400
     
-    audio_path = '/tmp/audio.wav'
-    audio_file.save(audio_path)
+    try:
+        for required in (ENSEMBLE_MODELS if ensemble else [model_id]):
+            REGISTRY.get(required)
+    except Exception as e:
+        return jsonify({"error": f"Model not available: {e}"}), 503
     
     try:
-        speech, sr = librosa.load(audio_path, sr=16000)
+        with timer.stage("decode_audio"):
+            speech = decode_audio(audio_file.read())
     except Exception as e:
         return jsonify({"error": f"Audio load failed: {e}"}), 400
     
+    with timer.stage("prepare"):
+        speech, audio_report = prepare_clip(speech)
+        fingerprint = ANALYSIS_CACHE.fingerprint(speech)
+    
+    if ensemble:
+        try:
+            result = run_ensemble(speech, fingerprint, word, accent_code, mode, timer)
+        except Exception as e:
+            return jsonify({"error": f"Inference failed: {e}"}), 500
+        result["audio"] = audio_report
+        result["admission"] = {"wait_ms": round(waited * 1000, 1), **result["admission"]}
+        return jsonify(result)
+    
+    # A cached clip needs no inference, so it is never degraded
+    cached = cached_output(fingerprint, model_id)
+    served_id = model_id if cached else serving_model(model_id)
+    timer.labels["model"] = served_id
+    
     try:
-        processor = MODELS[model_id]["processor"]
-        model = MODELS[model_id]["model"]
-        
-        inputs = processor(speech, sampling_rate=sr, return_tensors="pt")
-        with torch.no_grad():
-            logits = model(**inputs).logits
-        
-        predicted_ids = torch.argmax(logits, dim=-1)
-        transcription = processor.batch_decode(predicted_ids)[0]
+        if cached:
+            logits, transcription = cached
+        else:
+            logits, (batch_wait, forward) = MODELS[served_id]["batcher"].infer_timed(speech)
+            timer.record("batch_wait", batch_wait)
+            timer.record("forward", forward)
+            with timer.stage("ctc_decode"):
+                transcription = decode_logits(served_id, logits)
+            # The batcher hands out views of the whole batch's logits
+            ANALYSIS_CACHE.put(fingerprint, served_id, logits.clone(), transcription)
     except Exception as e:
         return jsonify({"error": f"Inference failed: {e}"}), 500
     
+    with timer.stage("phonemes"):
+        expected_espeak, expected_ipa = expected_phonemes(word, accent_code)
+    with timer.stage("scoring"):
+        result = analysis_result(transcription, expected_espeak, expected_ipa)
+    if mode == "gop":
+        try:
+            with timer.stage("gop"):
+                add_gop(result, served_id, logits, expected_espeak)
+        except Exception as e:
+            return jsonify({"error": f"GOP scoring failed: {e}"}), 500
+    result["audio"] = audio_report
+    result["admission"] = {
+        "wait_ms": round(waited * 1000, 1),
+        "model": served_id,
+        "degraded": served_id != model_id,
+        "cached": cached is not None
+    }
+    return jsonify(result)
+
+def ensemble_outputs(speech, fingerprint, timer):
+    """(served model, logits, transcription, cached) of every ENSEMBLE_MODELS model for one clip"""
+    outputs, pending = {}, {}
+    for model_id in ENSEMBLE_MODELS:
+        cached = cached_output(fingerprint, model_id)
+        if cached:
+            outputs[model_id] = (model_id, *cached, True)
+        else:
+            served_id = serving_model(model_id)
+            pending[model_id] = (served_id, MODELS[served_id]["batcher"].submit(speech))
+    
+    # The batchers work on their own threads; this only waits for the slowest
+    with timer.stage("ensemble_forward"):
+        logits = {model_id: future.result() for model_id, (_, future) in pending.items()}
+    with timer.stage("ctc_decode"):
+        for model_id, (served_id, _) in pending.items():
+            transcription = decode_logits(served_id, logits[model_id])
+            ANALYSIS_CACHE.put(fingerprint, served_id, logits[model_id].clone(), transcription)
+            outputs[model_id] = (served_id, logits[model_id], transcription, False)
+    return outputs
+
+def run_ensemble(speech, fingerprint, word, accent_code, mode, timer):
+    """The /analyze result for model=ensemble: the first model's result with the mean
+    score, plus every model's own result and how closely their transcriptions agree"""
+    outputs = ensemble_outputs(speech, fingerprint, timer)
+    with timer.stage("phonemes"):
+        expected_espeak, expected_ipa = expected_phonemes(word, accent_code)
+    
+    with timer.stage("scoring"):
+        results = {
+            model_id: analysis_result(transcription, expected_espeak, expected_ipa)
+            for model_id, (_, _, transcription, _) in outputs.items()
+        }
+    if mode == "gop":
+        with timer.stage("gop"):
+            for model_id, (served_id, logits, _, _) in outputs.items():
+                add_gop(results[model_id], served_id, logits, expected_espeak)
+    
+    transcriptions = [results[m]["transcription"] for m in ENSEMBLE_MODELS]
+    pairs = [(a, b) for i, a in enumerate(transcriptions) for b in transcriptions[i + 1:]]
+    agreement = [alignment["score"] for alignment in ALIGNER.align_many(pairs)]
+    scores = [results[m]["score"] for m in ENSEMBLE_MODELS]
+    
+    result = dict(results[ENSEMBLE_MODELS[0]])
+    result.update(
+        score=round(sum(scores) / len(scores)),
+        match=all(r["match"] for r in results.values()),
+        models=results,
+        ensemble={
+            "models": ENSEMBLE_MODELS,
+            "scores": dict(zip(ENSEMBLE_MODELS, scores)),
+            "agreement": round(sum(agreement) / len(agreement))
+        },
+        admission={
+            "model": ENSEMBLE_ID,
+            "served": {model_id: output[0] for model_id, output in outputs.items()},
+            "degraded": any(output[0] != model_id for model_id, output in outputs.items()),
+            "cached": all(output[3] for output in outputs.values())
+        }
+    )
+    return result
+
+def decode_logits(model_id, logits):
+    """Greedy CTC transcription of one clip's logits"""
+    predicted_ids = torch.argmax(logits, dim=-1)
+    return MODELS[model_id]["processor"].batch_decode([predicted_ids])[0]
+
+def expected_phonemes(word, accent_code):
+    """(eSpeak, IPA) reference phonemes for a word, "N/A" when unknown"""
+    accent_name = ACCENT_MAP.get(accent_code, "American")
+    
     # Get phonemes lazily
     phoneme_data = get_word_phonemes_lazy(word, accent_code)
     if not phoneme_data:
@@ -489,18 +927,149 @@ def analyze():
     
     expected_espeak = phoneme_data.get("espeak", "N/A") if phoneme_data else "N/A"
     expected_ipa = phoneme_data.get("ipa", "N/A") if phoneme_data else "N/A"
+    return expected_espeak, expected_ipa
+
+def analysis_result(transcription, expected_espeak, expected_ipa):
+    """The /analyze response body for a transcription"""
     detected_ipa = espeak_to_ipa(transcription)
     
-    score = calculate_score(transcription, expected_espeak)
+    alignment = ALIGNER.align(transcription, expected_espeak) if expected_espeak != "N/A" else None
+    score = alignment["score"] if alignment else 0
     
-    return jsonify({
+    return {
         "transcription": transcription,
         "detected_ipa": detected_ipa,
         "expected_espeak": expected_espeak,
         "expected_ipa": expected_ipa,
         "score": score,
-        "match": score == 100
+        "match": score == 100,
+        "mode": "alignment",
+        "alignment": alignment["ops"] if alignment else []
+    }
+
+# Scoring modes: "alignment" scores the greedy transcription, "gop" the CTC
+# posteriors of the expected phonemes after forced alignment (see gop.py)
+SCORING_MODES = ("alignment", "gop")
+GOP_SCORERS = {}
+
+def gop_scorer(model_id):
+    scorer = GOP_SCORERS.get(model_id)
+    if scorer is None:
+        hop = math.prod(REGISTRY.get(model_id).config.conv_stride)
+        scorer = GopScorer(MODELS[model_id]["processor"].tokenizer, frame_seconds=hop / 16000)
+        GOP_SCORERS[model_id] = scorer
+    return scorer
+
+def add_gop(result, model_id, logits, expected_espeak):
+    """Rescore a result with per-phoneme goodness of pronunciation"""
+    gop = gop_scorer(model_id).score(logits, ALIGNER.tokenize(expected_espeak))
+    result.update(mode="gop", score=gop["score"], gop=gop)
+    return result
+
+# Streaming analysis: partial results every STREAM_STEP_MS of new audio
+STREAM_STEP_MS = int(os.environ.get("STREAM_STEP_MS", "500"))
+STREAM_CONTEXT_MS = int(os.environ.get("STREAM_CONTEXT_MS", "1000"))
+STREAM_LOOKAHEAD_MS = int(os.environ.get("STREAM_LOOKAHEAD_MS", "500"))
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "30"))
+
+def send_json(ws, message):
+    ws.send(json.dumps(message))
+
+def stop_requested(message):
+    """True for the client's {"type": "stop"} control message"""
+    try:
+        return json.loads(message).get("type") == "stop"
+    except (ValueError, AttributeError):
+        return False
+
+def run_stream(ws, client):
+    """Streaming /analyze over a WebSocket (anything with blocking receive()/send())
+    
+    The client sends {"word", "accent", "model", "mode"}, then binary 16 kHz mono
+    16-bit PCM chunks while recording, then {"type": "stop"}. The server
+    answers with {"type": "partial", ...} messages as audio arrives and one
+    {"type": "final", ...} carrying the /analyze result for the whole clip.
+    Partial passes are skipped while /analyze requests are queued; the final
+    pass goes through admission control like /analyze.
+    """
+    try:
+        params = json.loads(ws.receive())
+    except (TypeError, ValueError):
+        params = None
+    if not isinstance(params, dict):
+        return send_json(ws, {"type": "error", "error": "Expected a JSON start message"})
+    
+    word = params.get('word', '')
+    accent_code = params.get('accent', 'en-US')
+    model_id = params.get('model', 'wav2vec2_lv60')
+    mode = params.get('mode', 'alignment')
+    
+    if model_id not in MODELS:
+        return send_json(ws, {"type": "error", "error": "Model not available"})
+    if mode not in SCORING_MODES:
+        return send_json(ws, {"type": "error", "error": f"Unknown mode, expected one of {', '.join(SCORING_MODES)}"})
+    try:
+        model = REGISTRY.get(model_id)
+    except Exception as e:
+        return send_json(ws, {"type": "error", "error": f"Model not available: {e}"})
+    
+    expected_espeak, expected_ipa = expected_phonemes(word, accent_code)
+    batcher = MODELS[model_id]["batcher"]
+    decoder = StreamDecoder(
+        batcher.infer, MODELS[model_id]["processor"], model.config,
+        step_s=STREAM_STEP_MS / 1000, left_s=STREAM_CONTEXT_MS / 1000,
+        right_s=STREAM_LOOKAHEAD_MS / 1000, max_s=STREAM_MAX_SECONDS
+    )
+    
+    while not decoder.full:
+        message = ws.receive()
+        if isinstance(message, str):
+            if stop_requested(message):
+                break
+            continue
+        
+        decoder.add(pcm16_to_float(message))
+        if decoder.due() and not ADMISSION.pressure():
+            try:
+                transcription = decoder.partial()
+            except Exception as e:
+                return send_json(ws, {"type": "error", "error": f"Inference failed: {e}"})
+            send_json(ws, {
+                "type": "partial",
+                "transcription": transcription,
+                "detected_ipa": espeak_to_ipa(transcription),
+                "score": calculate_score(transcription, expected_espeak),
+                **decoder.stats()
+            })
+    
+    # Final pass over the whole clip so the result matches /analyze
+    speech, audio_report = prepare_clip(decoder.audio())
+    if len(speech) < 2 * decoder.hop:
+        return send_json(ws, {"type": "error", "error": "No audio received"})
+    try:
+        with ADMISSION.admit(client):
+            logits = batcher.infer(speech)
+        transcription = decode_logits(model_id, logits)
+        result = analysis_result(transcription, expected_espeak, expected_ipa)
+        if mode == "gop":
+            add_gop(result, model_id, logits, expected_espeak)
+    except Rejected as e:
+        ADMISSION_REJECTED.labels(e.reason).inc()
+        return send_json(ws, {"type": "error", "error": "Server busy, retry later",
+                              "reason": e.reason, "retry_after": e.retry_after})
+    except Exception as e:
+        return send_json(ws, {"type": "error", "error": f"Inference failed: {e}"})
+    
+    send_json(ws, {
+        "type": "final",
+        **result,
+        **decoder.stats(),
+        "audio": audio_report
     })
 
+@sock.route('/stream')
+def stream(ws):
+    run_stream(ws, client_id())
+
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=False)
+    app.run(host='0.0.0.0', port=5000, debug=False, threaded=True)
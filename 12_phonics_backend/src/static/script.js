@@ -2,6 +2,7 @@ let mediaRecorder;
 let audioChunks = [];
 let selectedAccent = 'en-US';
 let selectedModel = '';
+let selectedMode = 'alignment';
 let selectedLevel = '';
 let selectedCategory = '';
 let selectedSoundId = null;
@@ -15,12 +16,20 @@ async function loadModels() {
     const models = await response.json();
     const select = document.getElementById('model-select');
     select.innerHTML = '';
-    models.forEach(m => {
+    // Degraded twins (with a `base` model) are only served under load, never picked
+    models.filter(m => !m.base).forEach(m => {
         const opt = document.createElement('option');
         opt.value = m.id;
         opt.textContent = m.name;
         select.appendChild(opt);
     });
+    // The ENSEMBLE_MODELS on one recording (model=ensemble on /analyze)
+    if (models.filter(m => m.ensemble).length > 1) {
+        const opt = document.createElement('option');
+        opt.value = 'ensemble';
+        opt.textContent = 'Compare models';
+        select.appendChild(opt);
+    }
     selectedModel = models[0]?.id || '';
 }
 
@@ -134,6 +143,27 @@ async function loadWords() {
         });
         wordButtons.appendChild(btn);
     });
+
+    prefetchPhonemes(data.words);
+}
+
+// Resolve expected phonemes for the whole word list in one request
+async function prefetchPhonemes(words) {
+    try {
+        const response = await fetch('/phonemes', {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({words: words, accents: [selectedAccent]})
+        });
+        if (!response.ok) return;
+        const phonemes = await response.json();
+        document.querySelectorAll('.example-btn').forEach(btn => {
+            const entry = phonemes[btn.dataset.word]?.[selectedAccent];
+            if (entry) btn.title = `/${entry.ipa}/  [${entry.espeak}]`;
+        });
+    } catch (error) {
+        // Expected phonemes are only a hint here; /analyze resolves them anyway
+    }
 }
 
 // Accent selection
@@ -159,6 +189,10 @@ document.getElementById('model-select').addEventListener('change', (e) => {
     selectedModel = e.target.value;
 });
 
+document.getElementById('mode-select').addEventListener('change', (e) => {
+    selectedMode = e.target.value;
+});
+
 // Listen button - works for both sounds and words
 document.getElementById('listen-button').addEventListener('click', async () => {
     if (!selectedWord) {
@@ -175,18 +209,13 @@ document.getElementById('listen-button').addEventListener('click', async () => {
         let response;
         // If selected word is the sound itself, use espeak phonemes
         // Otherwise use regular TTS (which uses espeak-ng)
+        // GET so the browser can reuse its cached copy (the server sends an ETag)
         if (selectedWord === selectedSound && referenceEspeak) {
-            response = await fetch('/tts-espeak', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({espeak: referenceEspeak, accent: selectedAccent})
-            });
+            const params = new URLSearchParams({espeak: referenceEspeak, accent: selectedAccent});
+            response = await fetch(`/tts-espeak?${params}`);
         } else {
-            response = await fetch('/tts', {
-                method: 'POST',
-                headers: {'Content-Type': 'application/json'},
-                body: JSON.stringify({text: selectedWord, accent: selectedAccent})
-            });
+            const params = new URLSearchParams({text: selectedWord, accent: selectedAccent});
+            response = await fetch(`/tts?${params}`);
         }
         
         if (!response.ok) {
@@ -218,19 +247,122 @@ document.getElementById('listen-button').addEventListener('click', async () => {
     }
 });
 
+// Streaming analysis: while recording, 16 kHz PCM goes to /stream over a
+// WebSocket and partial transcriptions come back. Recording the whole clip
+// and posting it to /analyze is the fallback when the socket cannot open.
+let streamSession = null;
+
+// Downsample Web Audio samples to 16 kHz 16-bit PCM
+function toPcm16(samples, inputRate) {
+    const ratio = inputRate / 16000;
+    const length = Math.floor(samples.length / ratio);
+    const pcm = new Int16Array(length);
+    for (let i = 0; i < length; i++) {
+        // Average the input samples that fall into each output sample
+        const start = Math.floor(i * ratio);
+        const end = Math.max(start + 1, Math.floor((i + 1) * ratio));
+        let sum = 0;
+        for (let j = start; j < end; j++) sum += samples[j];
+        const value = Math.max(-1, Math.min(1, sum / (end - start)));
+        pcm[i] = value < 0 ? value * 0x8000 : value * 0x7fff;
+    }
+    return pcm;
+}
+
+function openStream() {
+    return new Promise((resolve, reject) => {
+        const protocol = location.protocol === 'https:' ? 'wss:' : 'ws:';
+        const socket = new WebSocket(`${protocol}//${location.host}/stream`);
+        socket.binaryType = 'arraybuffer';
+        socket.onopen = () => resolve(socket);
+        socket.onerror = () => reject(new Error('WebSocket unavailable'));
+    });
+}
+
+async function startStreaming(stream) {
+    const socket = await openStream();
+    socket.send(JSON.stringify({word: selectedWord, accent: selectedAccent, model: selectedModel, mode: selectedMode}));
+    
+    const analyzingStatus = document.getElementById('analyzing-status');
+    let finished = false;
+    socket.onmessage = (e) => {
+        const data = JSON.parse(e.data);
+        if (data.type === 'partial') {
+            analyzingStatus.style.display = 'block';
+            analyzingStatus.innerHTML = `🎙 Hearing <code>${data.transcription}</code> (${data.score}%)`;
+            return;
+        }
+        // The server finalizes on stop, or by itself once the clip is too long
+        finished = true;
+        stopStreaming();
+        socket.close();
+        analyzingStatus.style.display = 'none';
+        if (data.type === 'final') {
+            showResult(data);
+        } else {
+            alert('Error analyzing audio: ' + data.error);
+        }
+    };
+    // Closed without a result (server error or restart, proxy idle timeout)
+    socket.onclose = () => {
+        if (finished) return;
+        stopStreaming();
+        analyzingStatus.style.display = 'none';
+        alert('Connection to the server was lost, please record again');
+    };
+    
+    const audioContext = new AudioContext();
+    const source = audioContext.createMediaStreamSource(stream);
+    const processor = audioContext.createScriptProcessor(4096, 1, 1);
+    processor.onaudioprocess = (e) => {
+        if (socket.readyState === WebSocket.OPEN) {
+            socket.send(toPcm16(e.inputBuffer.getChannelData(0), audioContext.sampleRate).buffer);
+        }
+    };
+    source.connect(processor);
+    processor.connect(audioContext.destination);
+    
+    streamSession = {socket, stream, audioContext, source, processor};
+}
+
+function stopStreaming() {
+    const session = streamSession;
+    if (!session) return;
+    streamSession = null;
+    
+    session.processor.disconnect();
+    session.source.disconnect();
+    session.audioContext.close();
+    session.stream.getTracks().forEach(track => track.stop());
+    if (session.socket.readyState === WebSocket.OPEN) {
+        session.socket.send(JSON.stringify({type: 'stop'}));
+    }
+    document.getElementById('record-button').disabled = false;
+    document.getElementById('stop-button').disabled = true;
+}
+
 document.getElementById('record-button').addEventListener('click', async () => {
     audioChunks = [];
     const analyzingStatus = document.getElementById('analyzing-status');
     analyzingStatus.style.display = 'none';
     
+    if (!selectedWord) {
+        alert('Select a word first');
+        return;
+    }
+    
     try {
         const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
-        mediaRecorder = new MediaRecorder(stream);
-        
-        mediaRecorder.ondataavailable = (e) => audioChunks.push(e.data);
-        mediaRecorder.onstop = sendAudio;
-        
-        mediaRecorder.start();
+        try {
+            // Comparing models scores the whole clip, so it is recorded and sent to /analyze
+            if (selectedModel === 'ensemble') throw new Error('Model comparison is not streamed');
+            await startStreaming(stream);
+        } catch (error) {
+            mediaRecorder = new MediaRecorder(stream);
+            mediaRecorder.ondataavailable = (e) => audioChunks.push(e.data);
+            mediaRecorder.onstop = sendAudio;
+            mediaRecorder.start();
+        }
         document.getElementById('record-button').disabled = true;
         document.getElementById('stop-button').disabled = false;
     } catch (error) {
@@ -239,6 +371,13 @@ document.getElementById('record-button').addEventListener('click', async () => {
 });
 
 document.getElementById('stop-button').addEventListener('click', () => {
+    if (streamSession) {
+        stopStreaming();
+        const analyzingStatus = document.getElementById('analyzing-status');
+        analyzingStatus.style.display = 'block';
+        analyzingStatus.textContent = '⏳ Finalizing...';
+        return;
+    }
     mediaRecorder.stop();
     document.getElementById('record-button').disabled = false;
     document.getElementById('stop-button').disabled = true;
@@ -266,6 +405,7 @@ async function sendAudio() {
     formData.append('accent', selectedAccent);
     formData.append('word', selectedWord);
     formData.append('model', selectedModel);
+    formData.append('mode', selectedMode);
     
     try {
         const response = await fetch('/analyze', { method: 'POST', body: formData });
@@ -273,28 +413,62 @@ async function sendAudio() {
         
         analyzingStatus.style.display = 'none';
         
-        const resultDiv = document.getElementById('result');
-        const scoreColor = getScoreColor(data.score);
-        
-        resultDiv.innerHTML = `
-            <div class="result-box">
-                <h3>Results</h3>
-                <p><strong>Detected:</strong></p>
-                <p>eSpeak: <code>${data.transcription}</code></p>
-                <p>IPA: <code>${data.detected_ipa}</code></p>
-                <hr style="margin: 15px 0; border: none; border-top: 1px solid #ddd;">
-                <p><strong>Expected:</strong></p>
-                <p>eSpeak: <code>${data.expected_espeak}</code></p>
-                <p>IPA: <code>${data.expected_ipa}</code></p>
-                <hr style="margin: 15px 0; border: none; border-top: 1px solid #ddd;">
-                <div class="score-display" style="background: ${scoreColor}; color: white; padding: 20px; border-radius: 8px; text-align: center;">
-                    <p style="font-size: 36px; font-weight: bold; margin: 0;">${data.score}%</p>
-                    <p style="margin: 5px 0; font-size: 14px;">${data.match ? '✓ Perfect!' : 'Keep practicing'}</p>
-                </div>
-            </div>
-        `;
+        showResult(data);
     } catch (error) {
         analyzingStatus.style.display = 'none';
         alert('Error analyzing audio: ' + error.message);
     }
 }
+
+// Expected phonemes marked with what was heard instead (or missed / added)
+function formatAlignment(ops) {
+    if (!ops || !ops.length) return 'N/A';
+    return ops.map(op => {
+        if (op.op === 'match') return `<code>${op.expected}</code>`;
+        if (op.op === 'substitute') return `<code style="color: #FF9800;" title="heard /${op.detected}/">${op.expected}→${op.detected}</code>`;
+        if (op.op === 'delete') return `<code style="color: #f44336; text-decoration: line-through;" title="missing">${op.expected}</code>`;
+        return `<code style="color: #999;" title="extra">+${op.detected}</code>`;
+    }).join(' ');
+}
+
+// Per-phoneme confidence from the forced alignment (GOP mode)
+function formatGop(gop) {
+    if (!gop.aligned) return 'Could not align the expected phonemes';
+    return gop.phonemes.map(p =>
+        `<code style="color: ${getScoreColor(p.confidence * 100)};" title="${p.start}-${p.end}s, GOP ${p.gop}">${p.phoneme} ${Math.round(p.confidence * 100)}%</code>`
+    ).join(' ');
+}
+
+// Each model's transcription and score when comparing models
+function formatEnsemble(data) {
+    return data.ensemble.models.map(id => {
+        const result = data.models[id];
+        return `<p>${id}: <code>${result.transcription}</code> <span style="color: ${getScoreColor(result.score)};">${result.score}%</span></p>`;
+    }).join('') + `<p>Agreement: ${data.ensemble.agreement}%</p>`;
+}
+
+function showResult(data) {
+    const resultDiv = document.getElementById('result');
+    const scoreColor = getScoreColor(data.score);
+    
+    resultDiv.innerHTML = `
+        <div class="result-box">
+            <h3>Results</h3>
+            <p><strong>Detected:</strong></p>
+            <p>eSpeak: <code>${data.transcription}</code></p>
+            <p>IPA: <code>${data.detected_ipa}</code></p>
+            <hr style="margin: 15px 0; border: none; border-top: 1px solid #ddd;">
+            <p><strong>Expected:</strong></p>
+            <p>eSpeak: <code>${data.expected_espeak}</code></p>
+            <p>IPA: <code>${data.expected_ipa}</code></p>
+            <hr style="margin: 15px 0; border: none; border-top: 1px solid #ddd;">
+            <p><strong>Phonemes:</strong> ${formatAlignment(data.alignment)}</p>
+            ${data.gop ? `<p><strong>Confidence:</strong> ${formatGop(data.gop)}</p>` : ''}
+            ${data.ensemble ? `<hr style="margin: 15px 0; border: none; border-top: 1px solid #ddd;"><p><strong>Models:</strong></p>${formatEnsemble(data)}` : ''}
+            <div class="score-display" style="background: ${scoreColor}; color: white; padding: 20px; border-radius: 8px; text-align: center;">
+                <p style="font-size: 36px; font-weight: bold; margin: 0;">${data.score}%</p>
+                <p style="margin: 5px 0; font-size: 14px;">${data.match ? '✓ Perfect!' : 'Keep practicing'}</p>
+            </div>
+        </div>
+    `;
+}
@@ -0,0 +1,98 @@
+"""Incremental CTC decoding of audio that arrives in chunks.
+
+StreamDecoder keeps the audio received so far and, every `step_s` seconds of
+new audio, runs the model over the part that is not final yet plus `left_s`
+of already decoded context. CTC frames further than `right_s` from the live
+edge no longer change as audio is added, so their ids are committed and never
+recomputed; only the tail is decoded again. Each partial pass therefore
+covers about left_s + right_s + step_s of audio however long the clip gets.
+"""
+import math
+
+import numpy as np
+import torch
+
+
+def pcm16_to_float(data):
+    """Little-endian 16-bit PCM bytes to float32 samples in [-1, 1)"""
+    data = data[:len(data) // 2 * 2]
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+
+class StreamDecoder:
+    """Partial greedy CTC transcriptions of a growing clip"""
+
+    def __init__(self, infer, processor, config, sample_rate=16000,
+                 step_s=0.5, left_s=1.0, right_s=0.5, max_s=30.0):
+        # infer(speech) -> (frames, vocab) logits, e.g. MicroBatcher.infer
+        self.infer = infer
+        self.processor = processor
+        self.sample_rate = sample_rate
+        self.hop = math.prod(config.conv_stride)
+        self.step = int(step_s * sample_rate)
+        self.left = int(left_s * sample_rate) // self.hop * self.hop
+        self.right = int(right_s * sample_rate)
+        self.max_samples = int(max_s * sample_rate)
+
+        self._chunks = []
+        self.samples = 0
+        self.dropped = 0
+        self.passes = 0
+        self._committed_ids = []
+        self._committed = 0
+        self._decoded_at = 0
+        self.transcription = ""
+
+    @property
+    def full(self):
+        return self.samples >= self.max_samples
+
+    def add(self, speech):
+        """Append float32 samples; anything past max_s is dropped and counted"""
+        room = self.max_samples - self.samples
+        if len(speech) > room:
+            self.dropped += len(speech) - room
+            speech = speech[:room]
+        if len(speech):
+            self._chunks.append(speech)
+            self.samples += len(speech)
+
+    def audio(self):
+        """The whole clip received so far"""
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def due(self):
+        """True once step_s of audio has arrived since the last partial pass"""
+        return self.samples - self._decoded_at >= self.step
+
+    def partial(self):
+        """Decode the uncommitted tail and return the provisional transcription"""
+        audio = self.audio()
+        end = len(audio)
+        start = max(0, self._committed - self.left)
+        self._decoded_at = end
+        if end - start < 2 * self.hop:
+            return self.transcription
+
+        logits = self.infer(audio[start:end])
+        self.passes += 1
+        ids = torch.argmax(logits, dim=-1).tolist()
+        tail = ids[(self._committed - start) // self.hop:]
+
+        # Frames well behind the live edge are final
+        stable = min(len(tail), max(0, (end - self.right - self._committed) // self.hop))
+        self._committed_ids.extend(tail[:stable])
+        self._committed += stable * self.hop
+
+        self.transcription = self.processor.batch_decode([self._committed_ids + tail[stable:]])[0]
+        return self.transcription
+
+    def stats(self):
+        return {
+            "audio_seconds": round(self.samples / self.sample_rate, 2),
+            "committed_seconds": round(self._committed / self.sample_rate, 2),
+            "dropped_samples": self.dropped,
+            "passes": self.passes,
+        }
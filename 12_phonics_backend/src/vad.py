@@ -0,0 +1,62 @@
+"""Silence trimming and length capping before the wav2vec2 forward pass.
+
+Recordings start and end with whatever the microphone picked up around the
+record/stop clicks. prepare_speech() finds the first and last frames whose
+energy is within `top_db` of the loudest one (and above an absolute floor),
+keeps `pad_ms` around them, and cuts the result to `max_seconds`. Inference
+cost scales with clip length, so every dropped sample is saved work.
+"""
+import numpy as np
+
+
+def frame_db(speech, frame):
+    """RMS level of each `frame`-sample frame in dBFS"""
+    n = len(speech) // frame
+    frames = speech[:n * frame].reshape(n, frame)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+
+def voiced_bounds(speech, sr=16000, top_db=35.0, floor_db=-55.0, frame_ms=20, pad_ms=150):
+    """(start, end) sample range holding the speech, or None if nothing is loud enough"""
+    frame = int(sr * frame_ms / 1000)
+    if len(speech) < frame:
+        return None
+    levels = frame_db(speech, frame)
+    threshold = max(levels.max() - top_db, floor_db)
+    voiced = np.flatnonzero(levels > threshold)
+    if not len(voiced):
+        return None
+
+    pad = int(sr * pad_ms / 1000)
+    start = max(0, int(voiced[0]) * frame - pad)
+    end = min(len(speech), (int(voiced[-1]) + 1) * frame + pad)
+    return start, end
+
+
+def prepare_speech(speech, sr=16000, trim=True, max_seconds=0, **vad):
+    """Trim leading/trailing silence and cap the length; returns (speech, report)"""
+    original = len(speech)
+    start, end = 0, original
+    speech_found = True
+    if trim:
+        bounds = voiced_bounds(speech, sr, **vad)
+        if bounds:
+            start, end = bounds
+        else:
+            speech_found = False
+
+    capped_end = end
+    if max_seconds:
+        capped_end = min(end, start + int(max_seconds * sr))
+
+    return speech[start:capped_end], {
+        "original_samples": original,
+        "samples": capped_end - start,
+        "trimmed_leading": start,
+        "trimmed_trailing": original - end,
+        "truncated": end - capped_end,
+        "dropped_samples": original - (capped_end - start),
+        "speech_detected": speech_found,
+        "duration_s": round((capped_end - start) / sr, 3),
+    }